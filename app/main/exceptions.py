@@ -7,3 +7,16 @@ class NoOrderException(Exception):
 class WrongDeltaException(Exception):
     def __init__(self, message: str | None = None):
         self.message = message
+
+
+class ServiceBusyException(Exception):
+    def __init__(self, message: str | None = None):
+        self.message = message
+
+
+class HashingQueueFullException(ServiceBusyException):
+    pass
+
+
+class OrderQueueFullException(ServiceBusyException):
+    pass
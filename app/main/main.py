@@ -1,8 +1,9 @@
 import os
 import sys
+import time
+from contextlib import asynccontextmanager
 from datetime import timedelta
 from typing import Annotated
-import uvicorn
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 from starlette import status
@@ -11,14 +12,17 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse
 from starlette.staticfiles import StaticFiles
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))  # noqa: E402
+from app import IMPORT_STARTED  # noqa: E402
 from routers import client_router, order_router
-from client_management_package import hash_password, EXPIRE_TIME_TOKEN, verify_password, create_access_token, Token
+from client_management_package import (EXPIRE_TIME_TOKEN, create_access_token, Token, verify_password_async,
+                                       password_hasher)
 from dependencies_package.main.dependencies import (query_or_cookie_extractor, global_dependency_verify_key_common,
                                                     dependency_with_yield)
-from app.main.exceptions import NoOrderException
-from memory_package import logger, increment_calls_count
+from app.main.exceptions import NoOrderException, ServiceBusyException
+from memory_package import logger, increment_calls_count, resolve
 from memory_package.in_memory_db.in_memory_db import ClientInDb
 from app.main.tags import Tags
+from orders_management_package import order_processor
 import memory_package
 
 description = """
@@ -77,6 +81,25 @@ tags_metadata = [
     },
 ]
 
+
+@asynccontextmanager
+async def lifespan(fastapi_app: FastAPI):
+    backend_started = time.perf_counter()
+    memory_package.init_db()
+    startup_finished = time.perf_counter()
+    fastapi_app.state.startup_timings = {"db_type": memory_package.db_type,
+                                         "import_ms": round((IMPORT_FINISHED - IMPORT_STARTED) * 1000, 3),
+                                         "backend_init_ms": round((startup_finished - backend_started) * 1000, 3),
+                                         "total_ms": round((startup_finished - IMPORT_STARTED) * 1000, 3)}
+    logger.info(f"Startup finished: {fastapi_app.state.startup_timings}")
+    order_processor.start()
+    yield
+    await order_processor.stop()
+    await memory_package.status_writes.close()
+    password_hasher.shutdown()
+    await resolve(memory_package.db.close())
+
+
 app = FastAPI(dependencies=[Depends(global_dependency_verify_key_common), Depends(dependency_with_yield)],
               title='FastApiQueueApp',
               description=description,
@@ -92,7 +115,8 @@ app = FastAPI(dependencies=[Depends(global_dependency_verify_key_common), Depend
               },
               openapi_tags=tags_metadata,
               openapi_url="/api/v1/openapi.json",
-              redoc_url=None
+              redoc_url=None,
+              lifespan=lifespan
               )
 app.include_router(client_router)
 app.include_router(order_router)
@@ -130,8 +154,17 @@ async def no_order_exception_handler(_request: Request, exc: NoOrderException):
     )
 
 
+@app.exception_handler(ServiceBusyException)
+async def service_busy_exception_handler(_request: Request, exc: ServiceBusyException):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"message": exc.message},
+        headers={"Retry-After": "1"}
+    )
+
+
 @app.get('/', tags=[Tags.order_get])
-def send_app_info(query_or_ads_id: Annotated[str, Depends(query_or_cookie_extractor)] = None):
+async def send_app_info(query_or_ads_id: Annotated[str, Depends(query_or_cookie_extractor)] = None):
     """
     Get info if app works and how many tasks are currently saved
 
@@ -143,16 +176,38 @@ def send_app_info(query_or_ads_id: Annotated[str, Depends(query_or_cookie_extrac
         logger.info('App info function called without query/cookies value')
     return JSONResponse(status_code=status.HTTP_200_OK,
                         content={"message": "Success", "query_or_ads_id": query_or_ads_id,
-                                 "tasks_count": len(memory_package.db.get_orders_db())})
+                                 "tasks_count": (await resolve(memory_package.db.get_order_stats()))["orders"]})
+
+
+@app.get('/stats')
+async def get_stats():
+    await memory_package.status_writes.flush()
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content={"message": "Success", "stats": await resolve(memory_package.db.get_order_stats())})
+
+
+@app.get('/pool/stats')
+async def get_pool_stats():
+    pool_stats = memory_package.db.get_pool_metrics()
+    if pool_stats is None:
+        return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "No connection pool"})
+    return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Success", "stats": pool_stats})
+
+
+@app.get('/startup/stats')
+async def get_startup_stats(request: Request):
+    startup_timings = getattr(request.app.state, 'startup_timings', None)
+    if startup_timings is None:
+        return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Startup not finished"})
+    return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Success", "stats": startup_timings})
 
 
 @app.post("/token")
 async def real_login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
-    client: ClientInDb = memory_package.db.get_client_by_name(form_data.username)
+    client: ClientInDb = await resolve(memory_package.db.get_client_by_name(form_data.username))
     if not client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Incorrect username")
-    hashed_password = hash_password(form_data.password)
-    if not verify_password(client.password, hashed_password):
+    if not await verify_password_async(form_data.password, client.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect password")
 
     access_token_expires = timedelta(minutes=EXPIRE_TIME_TOKEN)
@@ -163,5 +218,9 @@ async def real_login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()])
     return Token(access_token=access_token, token_type="bearer")
 
 
+IMPORT_FINISHED = time.perf_counter()
+
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
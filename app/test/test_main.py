@@ -1,3 +1,6 @@
+import os
+import subprocess
+import sys
 from datetime import datetime
 
 import jwt
@@ -54,6 +57,59 @@ def test_send_app_info_should_send_back_correct_number_of_orders():
     assert response.json()["tasks_count"] == memory_package.db.get_orders_count()
 
 
+def test_get_stats_should_follow_added_claimed_and_removed_orders():
+    client_id = local_add_client(client1)
+    for description, order_time in (("order1", 10), ("order2", 20), ("order3", 90)):
+        if memory_package.db_type == 'memory':
+            local_add_order(Order(id=memory_package.db.get_next_order_id(), description=description, time=order_time,
+                                  client_id=client_id, creation_date=datetime.now()))
+        else:
+            local_add_order(OrderInDb(description=description, time=order_time, client_id=client_id,
+                                      creation_date=datetime.now()))
+    stats = test_client.get("/stats").json()['stats']
+    assert (stats['orders'], stats['clients'], stats['orders_by_status']['received']) == (3, 1, 3)
+    assert stats['time'] == {'average': 40, 'p50': 20, 'p90': 90, 'p99': 90}
+    memory_package.db.open_dbs()
+    memory_package.db.remove_order(memory_package.db.claim_order_for_processing())
+    memory_package.db.claim_order_for_processing()
+    stats = test_client.get("/stats").json()['stats']
+    assert stats['orders_by_status'] == {'received': 1, 'in_progress': 1, 'complete': 0}
+    assert stats['time']['average'] == 55
+    if hasattr(memory_package.db, 'order_stats'):
+        memory_package.db.order_stats.mark_stale()
+        assert test_client.get("/stats").json()['stats'] == stats
+
+
+def test_get_pool_stats_should_report_pool_of_sql_backends():
+    test_client.get("/")
+    response = test_client.get("/pool/stats")
+    assert response.status_code == status.HTTP_200_OK
+    if memory_package.db_type == 'memory':
+        assert response.json()['message'] == 'No connection pool'
+    else:
+        stats = response.json()['stats']
+        assert stats['pool_class'].startswith('Timed')
+        assert stats['checkouts'] > 0
+
+
+def test_get_startup_stats_should_report_timings_after_lifespan_startup():
+    with TestClient(app) as client:
+        response = client.get("/startup/stats")
+    assert response.status_code == status.HTTP_200_OK
+    stats = response.json()['stats']
+    assert stats['db_type'] == memory_package.db_type
+    assert 0 <= stats['backend_init_ms'] <= stats['total_ms']
+
+
+def test_importing_app_should_not_load_sql_and_security_modules_before_startup():
+    code = ("import sys, app.main.main, memory_package; "
+            "print(memory_package.db, [name for name in ('sqlalchemy', 'passlib', 'jwt') if name in sys.modules])")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.join(os.path.dirname(__file__), '..', '..'),
+                            env=os.environ | {'DB_BACKEND': 'memory'})
+    assert result.stdout.strip() == "None []"
+
+
 def test_send_app_info_should_return_ok_response_when_correct_global_dependency_key():
     headers = {'key': 'key'}
     response = test_client.get("/", headers=headers)
@@ -78,7 +134,7 @@ def test_send_app_info_should_return_middleware_calls_counted_in_header():
 
 def test_real_login_should_return_valid_token():
     local_add_client(client1)
-    form = {"username": client1.name, "password": client1.password}
+    form = {"username": client1.name, "password": 'abc'}
     response = test_client.post("/token", data=form)
     token = response.json()['access_token']
     decoded_token = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -1,3 +1,4 @@
 from .main.token_vars import ALGORITHM, EXPIRE_TIME_TOKEN, SECRET_KEY
-from .main.passwords import verify_password, hash_password, pwd_context
+from .main.passwords import (verify_password, hash_password, pwd_context, password_hasher, hash_password_async,
+                             verify_password_async, PasswordHasher)
 from .main.token import create_access_token, Token
@@ -1,6 +1,28 @@
-from passlib.context import CryptContext
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from app.main.exceptions import HashingQueueFullException
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+class _LazyCryptContext:
+    def __init__(self, **settings):
+        self._settings = settings
+        self._context = None
+
+    def __getattr__(self, name):
+        if self._context is None:
+            from passlib.context import CryptContext
+            self._context = CryptContext(**self._settings)
+        return getattr(self._context, name)
+
+
+pwd_context = _LazyCryptContext(schemes=["bcrypt"], deprecated="auto")
+
+HASHING_EXECUTOR_TYPE = os.getenv('HASHING_EXECUTOR_TYPE', 'thread')
+HASHING_MAX_WORKERS = int(os.getenv('HASHING_MAX_WORKERS', min(4, os.cpu_count() or 1)))
+HASHING_MAX_QUEUE_DEPTH = int(os.getenv('HASHING_MAX_QUEUE_DEPTH', 64))
+DEFAULT_PASSWORD = "123"
 
 
 def hash_password(password: str):
@@ -9,3 +31,76 @@ def hash_password(password: str):
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    def __init__(self, executor_type: str = HASHING_EXECUTOR_TYPE, max_workers: int = HASHING_MAX_WORKERS,
+                 max_queue_depth: int = HASHING_MAX_QUEUE_DEPTH):
+        if executor_type not in ('thread', 'process'):
+            raise ValueError("Unsupported executor type: {}".format(executor_type))
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self._executor: Executor | None = None
+        self._default_password_hash: str | None = None
+        self.pending = 0
+        self.submitted_count = 0
+        self.completed_count = 0
+        self.rejected_count = 0
+        self.busy_seconds = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    async def default_password_hash(self) -> str:
+        if self._default_password_hash is None:
+            self._default_password_hash = await self.hash(DEFAULT_PASSWORD)
+        return self._default_password_hash
+
+    def get_metrics(self) -> dict:
+        return {"executor_type": self.executor_type, "max_workers": self.max_workers,
+                "max_queue_depth": self.max_queue_depth, "pending": self.pending,
+                "submitted": self.submitted_count, "completed": self.completed_count,
+                "rejected": self.rejected_count,
+                "average_seconds": self.busy_seconds / self.completed_count if self.completed_count else 0.0}
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, function, *args):
+        if self.pending >= self.max_queue_depth:
+            self.rejected_count += 1
+            raise HashingQueueFullException(f"Password hashing queue is full ({self.max_queue_depth} pending)")
+        self.pending += 1
+        self.submitted_count += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), function, *args)
+        finally:
+            self.pending -= 1
+            self.completed_count += 1
+            self.busy_seconds += time.perf_counter() - start
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='password-hasher')
+        return self._executor
+
+
+password_hasher = PasswordHasher()
+
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
@@ -1,5 +1,4 @@
 from datetime import timedelta, datetime
-import jwt
 from pydantic import BaseModel
 from client_management_package.main.token_vars import EXPIRE_TIME_TOKEN, SECRET_KEY, ALGORITHM
 from app.main.exceptions import WrongDeltaException
@@ -17,5 +16,6 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     expire = datetime.now() + expires_delta if expires_delta is not None \
         else datetime.now() + timedelta(EXPIRE_TIME_TOKEN)
     to_encode.update({"exp": expire})
+    import jwt
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
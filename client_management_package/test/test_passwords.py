@@ -1,4 +1,7 @@
-from client_management_package import hash_password, verify_password, pwd_context
+import asyncio
+import pytest
+from app.main.exceptions import HashingQueueFullException
+from client_management_package import hash_password, verify_password, pwd_context, PasswordHasher
 
 
 def test_hash_password_should_return_given_password_hash():
@@ -17,3 +20,39 @@ def test_verify_password_should_return_false_when_passwords_are_different():
     password = 'password123ABC'
     hashed_password = pwd_context.hash(password)
     assert not verify_password(password + '1', hashed_password)
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_should_hash_and_verify_in_pool_and_count_calls():
+    hasher = PasswordHasher(max_workers=2, max_queue_depth=4)
+    password = 'password123ABC'
+    hashed_password = await hasher.hash(password)
+    assert await hasher.verify(password, hashed_password)
+    assert not await hasher.verify(password + '1', hashed_password)
+    metrics = hasher.get_metrics()
+    assert metrics['submitted'] == 3
+    assert metrics['completed'] == 3
+    assert metrics['pending'] == 0
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_should_reject_calls_when_queue_is_full():
+    hasher = PasswordHasher(max_workers=1, max_queue_depth=1)
+    first = asyncio.ensure_future(hasher.hash('password123ABC'))
+    await asyncio.sleep(0)
+    with pytest.raises(HashingQueueFullException):
+        await hasher.hash('password123ABC')
+    await first
+    assert hasher.get_metrics()['rejected'] == 1
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_should_hash_default_password_once():
+    hasher = PasswordHasher()
+    first_hash = await hasher.default_password_hash()
+    assert await hasher.default_password_hash() == first_hash
+    assert verify_password("123", first_hash)
+    assert hasher.get_metrics()['submitted'] == 1
+    hasher.shutdown()
@@ -1,5 +1,6 @@
+import pytest
 import memory_package
-from memory_package import PostgresDb, InMemoryDb, SQLModelDb
+from memory_package import PostgresDb, InMemoryDb, SQLModelDb, SQLiteDb, db_settings
 
 
 def pytest_addoption(parser):
@@ -7,7 +8,7 @@ def pytest_addoption(parser):
         "--db",
         action="store",
         default="memory",
-        help="Type of database to use. Options are: 'memory', 'postgres', 'model'. Default is 'memory'."
+        help="Type of database to use. Options are: 'memory', 'postgres', 'model', 'sqlite'. Default is 'memory'."
     )
 
 
@@ -22,5 +23,15 @@ def pytest_generate_tests(metafunc):
     elif db_type == 'model':
         memory_package.db = SQLModelDb()
         memory_package.db_type = 'model'
+    elif db_type == 'sqlite':
+        memory_package.db = SQLiteDb()
+        memory_package.db_type = 'sqlite'
     else:
         raise ValueError("Unsupported database type: {}".format(db_type))
+
+
+@pytest.fixture(autouse=True)
+def sqlite_db_file(tmp_path, monkeypatch):
+    if memory_package.db_type == 'sqlite':
+        monkeypatch.setattr(db_settings, 'sqlite_url', 'sqlite:///' + str(tmp_path / 'app.db'))
+        memory_package.db = SQLiteDb()
@@ -1,3 +1,5 @@
 from .main.dependencies import (get_current_client, delete_of_ids_common_parameters, query_or_cookie_extractor,
                                 query_parameter_extractor, verify_key_common, global_dependency_verify_key_common,
-                                dependency_with_yield)
+                                dependency_with_yield, pagination_common_parameters,
+                                PaginationAnnotation, cut_page_and_set_cursor, request_unit_of_work,
+                                UnitOfWorkDependency)
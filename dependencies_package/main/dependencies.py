@@ -1,13 +1,11 @@
 import sys
 from typing import Annotated
-import jwt
-from fastapi import Header, HTTPException, Form, Depends, Cookie
+from fastapi import Header, HTTPException, Form, Depends, Cookie, Query, Response
 from fastapi.security import OAuth2PasswordBearer
-from jwt import InvalidTokenError
 from starlette import status
 from client_management_package import SECRET_KEY, ALGORITHM
-from memory_package import orders_lock
 import memory_package
+from memory_package import resolve
 
 
 class CommonQueryParamsClass:
@@ -37,21 +35,42 @@ async def delete_of_ids_common_parameters(first: int = 0, last: int = sys.maxsiz
 
 CommonDependencyAnnotation = Annotated[dict, Depends(delete_of_ids_common_parameters)]
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+async def pagination_common_parameters(limit: Annotated[int | None, Query(gt=0, le=MAX_PAGE_SIZE)] = None,
+                                       after_id: int | None = None):
+    if limit is None and after_id is not None:
+        limit = DEFAULT_PAGE_SIZE
+    return {"limit": limit, "after_id": after_id}
+
+
+PaginationAnnotation = Annotated[dict, Depends(pagination_common_parameters)]
+
+
+def cut_page_and_set_cursor(response: Response, rows: list, limit: int | None, get_id) -> list:
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["next_after_id"] = str(get_id(rows[-1]))
+    return rows
+
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
 async def get_current_client(token: Annotated[str, Depends(oauth2_scheme)]):
+    import jwt
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if not username:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No username in token",
                                 headers={"WWW-Authenticate": "Bearer"})
-    except InvalidTokenError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail="Invalid token error",
                             headers={"WWW-Authenticate": "Bearer"})
-    client = memory_package.db.get_client_by_name(username)
+    client = await resolve(memory_package.db.get_client_by_name(username))
     if not client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No client with given username",
                             headers={"WWW-Authenticate": "Bearer"})
@@ -64,13 +83,19 @@ async def global_dependency_verify_key_common(key: Annotated[str | None, Header(
 
 
 async def dependency_with_yield():
+    db = memory_package.db
     try:
-        async with orders_lock:
-            memory_package.db.open_dbs()
-            clients_db = memory_package.db.get_clients_db()
-            orders_db = memory_package.db.get_orders_db()
-        yield clients_db, orders_db
+        db.open_dbs()
+        yield db
     except Exception:
         raise
     finally:
-        memory_package.db.close_dbs()
+        db.close_dbs()
+
+
+async def request_unit_of_work():
+    async with memory_package.db.unit_of_work():
+        yield
+
+
+UnitOfWorkDependency = Depends(request_unit_of_work, scope="function")
@@ -9,7 +9,7 @@ from client_management_package import SECRET_KEY, ALGORITHM
 from client_package.client import Client
 from dependencies_package import (global_dependency_verify_key_common, dependency_with_yield,
                                   delete_of_ids_common_parameters, query_parameter_extractor, query_or_cookie_extractor,
-                                  verify_key_common, get_current_client)
+                                  verify_key_common, get_current_client, request_unit_of_work)
 from app.main.main import app
 from memory_package import set_calls_count
 import memory_package
@@ -49,18 +49,13 @@ async def test_global_dependency_verify_key_common_should_throw_exception_when_c
 @pytest.mark.asyncio
 async def test_dependency_with_yield_should_open_yield_close_and_open_dbs():
     with (patch("dependencies_package.main.dependencies.memory_package.db.open_dbs") as mock_open_dbs,
-          patch("dependencies_package.main.dependencies.memory_package.db.close_dbs") as mock_close_dbs,
-          patch("dependencies_package.main.dependencies.memory_package.db.get_clients_db") as mock_get_clients_db,
-          patch("dependencies_package.main.dependencies.memory_package.db.get_orders_db") as mock_get_orders_db):
+          patch("dependencies_package.main.dependencies.memory_package.db.close_dbs") as mock_close_dbs):
         mock_open_dbs.return_value = None
         mock_close_dbs.return_value = None
-        mock_get_clients_db.return_value = "mocked_clients_db"
-        mock_get_orders_db.return_value = "mocked_orders_db"
 
         generator = dependency_with_yield()
-        async for clients_db, orders_db in generator:
-            assert clients_db == "mocked_clients_db"
-            assert orders_db == "mocked_orders_db"
+        async for db in generator:
+            assert db is memory_package.db
         mock_open_dbs.assert_called_once()
 
         async for _ in generator:
@@ -70,6 +65,18 @@ async def test_dependency_with_yield_should_open_yield_close_and_open_dbs():
         assert mock_close_dbs.call_count == 1
 
 
+@pytest.mark.asyncio
+async def test_dependency_with_yield_should_not_load_dbs():
+    with (patch("dependencies_package.main.dependencies.memory_package.db.get_clients_db") as mock_get_clients_db,
+          patch("dependencies_package.main.dependencies.memory_package.db.get_orders_db") as mock_get_orders_db):
+        generator = dependency_with_yield()
+        async for _ in generator:
+            pass
+
+        mock_get_clients_db.assert_not_called()
+        mock_get_orders_db.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_delete_of_ids_common_parameters_should_return_default_values_when_not_given():
     return_dict = await delete_of_ids_common_parameters()
@@ -167,3 +174,26 @@ async def test_get_current_client_should_throw_exception_when_no_client_with_use
     with pytest.raises(HTTPException) as exc_info:
         await get_current_client(fake_encoded_token)
     assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_request_unit_of_work_should_roll_back_all_writes_when_request_fails():
+    if memory_package.db_type == 'memory':
+        pytest.skip("In-memory backend has no transactions")
+    unit_of_work = request_unit_of_work()
+    await anext(unit_of_work)
+    memory_package.db.add_client('name1', 'abc')
+    assert memory_package.db.get_client_by_name('name1') is not None
+    with pytest.raises(RuntimeError):
+        await unit_of_work.athrow(RuntimeError())
+    assert memory_package.db.get_client_by_name('name1') is None
+
+
+@pytest.mark.asyncio
+async def test_request_unit_of_work_should_commit_once_when_request_succeeds():
+    unit_of_work = request_unit_of_work()
+    await anext(unit_of_work)
+    memory_package.db.add_client('name1', 'abc')
+    with pytest.raises(StopAsyncIteration):
+        await anext(unit_of_work)
+    assert memory_package.db.get_client_by_name('name1') is not None
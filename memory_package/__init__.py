@@ -1,23 +1,62 @@
+from importlib import import_module
 from .in_memory_vars import logger, orders_lock, increment_calls_count, set_calls_count
-from .db_abstract import AbstractDb
+from .db_abstract import AbstractDb, resolve, STREAM_BATCH_SIZE
+from .db_settings import db_settings
 from .in_memory_db.in_memory_db import InMemoryDb
-from .postgres_db.postgres_db import PostgresDb, Order as OrderPostgres, Client as ClientPostgres
-from .sql_model_db.sql_model_db import SQLModelDb
+from .cached_db.cached_db import CachedDb, CLIENT_CACHE_ENABLED
+from .status_write_buffer import StatusWriteBuffer, status_writes
 from client_package import Client
 
-db: AbstractDb = SQLModelDb()
-db_type: str = 'model'
+db: AbstractDb | None = None
+db_type: str = db_settings.backend
 
 db_classes = {
-    'memory': InMemoryDb,
-    'postgres': PostgresDb,
-    'model': SQLModelDb
+    'memory': 'InMemoryDb',
+    'postgres': 'PostgresDb',
+    'model': 'SQLModelDb',
+    'async': 'AsyncSQLDb',
+    'async_sqlite': 'AsyncSQLiteDb',
+    'sqlite': 'SQLiteDb'
 }
 
+_lazy_attributes = {
+    'PostgresDb': ('.postgres_db.postgres_db', 'PostgresDb'),
+    'OrderPostgres': ('.postgres_db.postgres_db', 'Order'),
+    'ClientPostgres': ('.postgres_db.postgres_db', 'Client'),
+    'SQLModelDb': ('.sql_model_db.sql_model_db', 'SQLModelDb'),
+    'AsyncSQLDb': ('.async_sql_db.async_sql_db', 'AsyncSQLDb'),
+    'AsyncSQLiteDb': ('.async_sql_db.async_sql_db', 'AsyncSQLiteDb'),
+    'SQLiteDb': ('.sqlite_db.sqlite_db', 'SQLiteDb'),
+    'DurableInMemoryDb': ('.in_memory_db.durable_in_memory_db', 'DurableInMemoryDb'),
+}
+
+
+def __getattr__(name):
+    if name not in _lazy_attributes:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _lazy_attributes[name]
+    return getattr(import_module(module_name, __name__), attribute)
+
+
+def get_db_class(name: str) -> type[AbstractDb]:
+    class_name = db_classes[name]
+    if name == 'memory' and db_settings.memory_persistence_dir:
+        class_name = 'DurableInMemoryDb'
+    return globals()[class_name] if class_name in globals() else __getattr__(class_name)
+
 
 def reset_db():
     global db
-    db = db_classes[db_type]()
+    status_writes.discard()
+    db = get_db_class(db_type)()
+    if CLIENT_CACHE_ENABLED:
+        db = CachedDb(db)
+
+
+def init_db() -> AbstractDb:
+    if db is None:
+        reset_db()
+    return db
 
 
 def mapper(client):
@@ -0,0 +1,326 @@
+import asyncio
+from contextlib import asynccontextmanager
+from sqlalchemy import func, delete
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import selectinload
+from sqlmodel import SQLModel, select, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+from client_package import ClientInDb
+from order_package import OrderStatus
+from memory_package.sql_model_db.models import Order, Client
+from memory_package.db_abstract import AbstractDb, STREAM_BATCH_SIZE
+from memory_package.blocking_list import BlockingList
+from memory_package.sql_statements import (claim_order_statement, delete_in_id_range_statement,
+                                           delete_clients_orders_in_id_range_statement, orders_by_status_statement,
+                                           page_statement, count_orders_by_client_ids_statement,
+                                           order_stats_statement, set_statuses_statement)
+from memory_package.unit_of_work import current_bind, async_unit_of_work
+from memory_package.engines import create_configured_async_engine, pool_metrics, TimedNullPool
+from memory_package.db_settings import db_settings
+from memory_package.order_stats import OrderStats
+from .db import DATABASE_URL, SQLITE_DATABASE_URL
+
+
+class AsyncSQLDb(AbstractDb):
+    def __init__(self, database_url: str = DATABASE_URL, **engine_kwargs):
+        self.engine = create_configured_async_engine(database_url, **engine_kwargs)
+        self.session_maker = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.schema_ready = False
+        self._schema_lock = asyncio.Lock()
+        self.blocked = False
+        self.order_stats = OrderStats(db_settings.stats_reconcile_interval)
+
+    async def _ensure_schema(self):
+        if self.schema_ready:
+            return
+        async with self._schema_lock:
+            if not self.schema_ready:
+                async with self.engine.begin() as connection:
+                    await connection.run_sync(SQLModel.metadata.create_all)
+                self.schema_ready = True
+
+    async def _session(self) -> AsyncSession:
+        await self._ensure_schema()
+        return self.session_maker(bind=current_bind(self.engine))
+
+    @asynccontextmanager
+    async def unit_of_work(self):
+        await self._ensure_schema()
+        async with async_unit_of_work(self.engine):
+            yield
+
+    def get_pool_metrics(self):
+        return pool_metrics(self.engine)
+
+    async def set_new_orders_db(self, new_orders_db: BlockingList):
+        self.order_stats.mark_stale()
+        async with await self._session() as session:
+            await session.exec(delete(Order))
+            for order in new_orders_db:
+                session.add(_to_order_model(order))
+            await session.commit()
+
+    async def set_new_clients_db(self, new_clients_db: BlockingList):
+        self.order_stats.mark_stale()
+        async with await self._session() as session:
+            await session.exec(delete(Client))
+            await session.commit()
+        for client in new_clients_db:
+            await self.add_client(client.name, client.password, client.photo, client.orders)
+
+    async def get_all_orders_as_dict(self, limit: int | None = None, after_id: int | None = None):
+        async with await self._session() as session:
+            results = (await session.exec(page_statement(Order, limit, after_id))).scalars().all()
+        return [order.model_dump() for order in results]
+
+    async def stream_all_orders_as_dict(self, after_id: int | None = None):
+        statement = page_statement(Order, after_id=after_id).execution_options(yield_per=STREAM_BATCH_SIZE)
+        async with await self._session() as session:
+            async for order in await session.stream_scalars(statement):
+                yield order.model_dump()
+
+    async def get_first_order_with_status(self, status_str: str):
+        statement = select(Order).where(Order.status == status_str).order_by(Order.id).limit(1)  # noqa
+        async with await self._session() as session:
+            return (await session.exec(statement)).first()
+
+    async def get_orders_by_status(self, status: OrderStatus, limit: int | None = None, after_id: int | None = None):
+        async with await self._session() as session:
+            return (await session.exec(orders_by_status_statement(Order, status, limit, after_id))).scalars().all()
+
+    async def get_order_by_id(self, order_id: int):
+        async with await self._session() as session:
+            return await session.get(Order, order_id)
+
+    async def claim_order_for_processing(self, order_id: int | None = None):
+        async with await self._session() as session:
+            order = (await session.exec(claim_order_statement(Order, order_id))).scalars().first()
+            await session.commit()
+            if order is not None:
+                self.order_stats.status_changed(OrderStatus.received, OrderStatus.in_progress)
+            return order
+
+    async def add_order(self, order):
+        if not self.blocked:
+            async with await self._session() as session:
+                order = _to_order_model(order)
+                session.add(order)
+                await session.flush()
+                self.order_stats.order_added(order.status, order.time)
+                await session.commit()
+
+    async def add_client(self, name, password, photo=str(), orders=None):
+        if not self.blocked:
+            client = Client(name=name, photo=photo, password=password)
+            async with await self._session() as session:
+                session.add(client)
+                await session.commit()
+                await session.refresh(client)
+                self.order_stats.client_added()
+                return client.id
+
+    async def add_order_to_client(self, order, client):
+        pass
+
+    async def get_client_by_name(self, full_name: str):
+        statement = select(Client).where(Client.name == full_name)  # noqa
+        async with await self._session() as session:
+            return (await session.exec(statement)).first()
+
+    async def get_clients_by_ids(self, client_ids: list[int]):
+        statement = select(Client).where(col(Client.id).in_(client_ids)).order_by(Client.id)  # noqa
+        async with await self._session() as session:
+            return (await session.exec(statement)).all()
+
+    async def count_orders_by_client_ids(self, client_ids: list[int]):
+        statement = count_orders_by_client_ids_statement(Order, Client, client_ids)
+        async with await self._session() as session:
+            return dict((await session.exec(statement)).all())
+
+    async def get_order_stats(self):
+        if self.order_stats.needs_reconcile():
+            async with await self._session() as session:
+                self.order_stats.load((await session.exec(order_stats_statement(Order))).all(),
+                                      (await session.exec(select(func.count()).select_from(Client))).one())
+        return self.order_stats.as_dict()
+
+    async def get_client_by_id(self, client_id: int):
+        if client_id is None:
+            return None
+        async with await self._session() as session:
+            return await session.get(Client, client_id)
+
+    async def get_clients_db(self, count: int = None, after_id: int | None = None):
+        statement = page_statement(Client, count, after_id).options(selectinload(Client.orders))
+        async with await self._session() as session:
+            return (await session.exec(statement)).scalars().all()
+
+    async def get_orders_db(self):
+        statement = select(Order).order_by(Order.id)  # noqa
+        async with await self._session() as session:
+            return (await session.exec(statement)).all()
+
+    async def remove_order(self, order: Order):
+        async with await self._session() as session:
+            removed = (await session.exec(delete(Order).where(Order.id == order.id)  # noqa
+                                          .returning(Order.status, Order.time))).first()
+            await session.commit()
+        if removed is not None:
+            self.order_stats.order_removed(*removed)
+
+    async def remove_client(self, client: ClientInDb):
+        async with await self._session() as session:
+            removed_order_ids = list((await session.exec(
+                delete(Order).where(Order.client_id == client.id).returning(Order.id))).scalars())  # noqa
+            await session.exec(delete(Client).where(Client.id == client.id))  # noqa
+            await session.commit()
+        self.order_stats.mark_stale()
+        return removed_order_ids
+
+    async def remove_orders_in_id_range(self, first: int, last: int):
+        async with await self._session() as session:
+            removed_ids = list((await session.exec(delete_in_id_range_statement(Order, first, last)
+                                                   .returning(Order.id))).scalars())
+            await session.commit()
+            self.order_stats.mark_stale()
+            return removed_ids
+
+    async def remove_clients_in_id_range(self, first: int, last: int):
+        async with await self._session() as session:
+            removed_order_ids = list((await session.exec(delete_clients_orders_in_id_range_statement(
+                Order, Client, first, last).returning(Order.id))).scalars())
+            removed_count = (await session.exec(delete_in_id_range_statement(Client, first, last))).rowcount
+            await session.commit()
+            self.order_stats.mark_stale()
+            return removed_count, removed_order_ids
+
+    async def get_next_order_id(self):
+        return await self._get_next_id(Order)
+
+    async def get_next_client_id(self):
+        return await self._get_next_id(Client)
+
+    async def _get_next_id(self, table):
+        statement = select(func.max(table.id))
+        async with await self._session() as session:
+            max_id = (await session.exec(statement)).one()
+            return 1 if max_id is None else max_id + 1
+
+    async def get_clients_count(self):
+        statement = select(func.count()).select_from(Client)
+        async with await self._session() as session:
+            return (await session.exec(statement)).one()
+
+    async def get_orders_count(self):
+        statement = select(func.count()).select_from(Order)
+        async with await self._session() as session:
+            return (await session.exec(statement)).one()
+
+    async def get_password_from_client_by_name(self, full_name: str):
+        statement = select(Client.password).where(Client.name == full_name)  # noqa
+        async with await self._session() as session:
+            return (await session.exec(statement)).first()
+
+    async def get_orders_by_client_id(self, client_id: int):
+        statement = select(Order).where(Order.client_id == client_id).order_by(Order.id)  # noqa
+        async with await self._session() as session:
+            if await session.get(Client, client_id) is None:
+                return None
+            return (await session.exec(statement)).all()
+
+    async def get_orders_by_client_name(self, client_name: str):
+        client = await self.get_client_by_name(client_name)
+        if client is None:
+            return []
+        return await self.get_orders_by_client_id(client.id)
+
+    async def clear_db(self):
+        await self.set_new_orders_db(BlockingList())
+        await self.set_new_clients_db(BlockingList())
+
+    def open_dbs(self):
+        self.blocked = False
+
+    def close_dbs(self):
+        self.blocked = True
+
+    async def remove_order_from_client(self, client, order) -> None:
+        pass
+
+    async def change_order_owner(self, client_id, order_id) -> None:
+        async with await self._session() as session:
+            order = await session.get(Order, order_id)
+            order.client_id = client_id
+            session.add(order)
+            await session.commit()
+
+    async def get_client_id_from_client_by_name(self, client_name) -> int:
+        statement = select(Client.id).where(Client.name == client_name)  # noqa
+        async with await self._session() as session:
+            return (await session.exec(statement)).one()
+
+    async def replace_order_in_client_object(self, order) -> None:
+        async with await self._session() as session:
+            order_db = await session.get(Order, order.id)
+            self.order_stats.order_replaced(order_db.status, order_db.time, order.status, order.time)
+            order_db.description = order.description
+            order_db.time = order.time
+            order_db.status = order.status
+            order_db.client_id = order.client_id
+            order_db.creation_date = order.creation_date
+            session.add(order_db)
+            await session.commit()
+
+    async def set_orders_statuses(self, statuses: dict[int, OrderStatus]):
+        async with await self._session() as session:
+            old_statuses = (await session.exec(select(Order.id, Order.status)
+                                               .where(col(Order.id).in_(statuses)))).all()
+            await session.exec(set_statuses_statement(Order, statuses))
+            await session.commit()
+        for order_id, old_status in old_statuses:
+            self.order_stats.status_changed(old_status, statuses[order_id])
+        return len(old_statuses)
+
+    async def map_client(self, client):
+        statement = select(Client).where(Client.name == client.name)  # noqa
+        async with await self._session() as session:
+            client = (await session.exec(statement)).one()
+            return Client.model_validate(client).model_dump()
+
+    async def change_client_password(self, client, hashed_password):
+        async with await self._session() as session:
+            client = await session.get(Client, client.id)
+            client.password = hashed_password
+            session.add(client)
+            await session.commit()
+
+    async def update_one_client(self, client_name: str, updated_client):
+        statement = select(Client).where(Client.name == client_name)  # noqa
+        async with await self._session() as session:
+            client = (await session.exec(statement)).one()
+            client.name = updated_client.name
+            client.password = updated_client.password
+            client.photo = updated_client.photo
+            session.add(client)
+            await session.commit()
+
+    async def remove_all_clients_orders(self, client) -> list[int]:
+        async with await self._session() as session:
+            removed_order_ids = list((await session.exec(
+                delete(Order).where(Order.client_id == client.id).returning(Order.id))).scalars())  # noqa
+            await session.commit()
+        self.order_stats.mark_stale()
+        return removed_order_ids
+
+
+class AsyncSQLiteDb(AsyncSQLDb):
+    def __init__(self, database_url: str = SQLITE_DATABASE_URL):
+        super().__init__(database_url, poolclass=TimedNullPool)
+
+
+def _to_order_model(order) -> Order:
+    if isinstance(order, Order):
+        return order
+    fields = {field: getattr(order, field) for field in ('id', 'description', 'time', 'status', 'client_id',
+                                                         'creation_date')}
+    return Order(**{field: value for field, value in fields.items() if value is not None})
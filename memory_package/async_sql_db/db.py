@@ -0,0 +1,4 @@
+from memory_package.db_settings import db_settings
+
+DATABASE_URL = db_settings.async_url
+SQLITE_DATABASE_URL = db_settings.async_sqlite_url
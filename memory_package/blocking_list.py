@@ -19,3 +19,7 @@ class BlockingList(list):
 
     def unblock(self):
         self._is_blocked = False
+
+    @property
+    def is_blocked(self):
+        return self._is_blocked
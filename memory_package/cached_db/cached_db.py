@@ -0,0 +1,138 @@
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from memory_package.db_abstract import AbstractDb, resolve
+
+CLIENT_CACHE_ENABLED = os.getenv('CLIENT_CACHE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+CLIENT_CACHE_MAX_SIZE = int(os.getenv('CLIENT_CACHE_MAX_SIZE', 1024))
+CLIENT_CACHE_TTL_SECONDS = float(os.getenv('CLIENT_CACHE_TTL_SECONDS', 30))
+
+_in_unit_of_work: ContextVar[bool] = ContextVar('cached_db_in_unit_of_work', default=False)
+
+
+class CachedDb:
+    def __init__(self, db: AbstractDb, max_size: int = CLIENT_CACHE_MAX_SIZE, ttl: float = CLIENT_CACHE_TTL_SECONDS):
+        self.db = db
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, object], tuple[float, object]] = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+    @asynccontextmanager
+    async def unit_of_work(self):
+        token = _in_unit_of_work.set(True)
+        try:
+            async with self.db.unit_of_work():
+                yield
+        except BaseException:
+            self.clear_cache()
+            raise
+        finally:
+            _in_unit_of_work.reset(token)
+
+    async def get_client_by_name(self, full_name: str):
+        return await self._read_through(('name', full_name), self.db.get_client_by_name, full_name)
+
+    async def get_client_by_id(self, client_id: int):
+        return await self._read_through(('id', client_id), self.db.get_client_by_id, client_id)
+
+    async def add_client(self, name, password, photo=str(), orders=None):
+        client_id = await resolve(self.db.add_client(name=name, password=password, photo=photo, orders=orders))
+        self._invalidate(('name', name), ('id', client_id))
+        return client_id
+
+    async def update_one_client(self, client_name: str, updated_client):
+        try:
+            return await resolve(self.db.update_one_client(client_name, updated_client))
+        finally:
+            self.clear_cache()
+
+    async def change_client_password(self, client, hashed_password):
+        try:
+            return await resolve(self.db.change_client_password(client, hashed_password))
+        finally:
+            self._invalidate_client(client)
+
+    async def remove_client(self, client):
+        try:
+            return await resolve(self.db.remove_client(client))
+        finally:
+            self._invalidate_client(client)
+
+    async def remove_clients_in_id_range(self, first: int, last: int):
+        try:
+            return await resolve(self.db.remove_clients_in_id_range(first, last))
+        finally:
+            self.clear_cache()
+
+    async def set_new_clients_db(self, new_clients_db):
+        try:
+            return await resolve(self.db.set_new_clients_db(new_clients_db))
+        finally:
+            self.clear_cache()
+
+    async def clear_db(self):
+        try:
+            return await resolve(self.db.clear_db())
+        finally:
+            self.clear_cache()
+
+    def clear_cache(self):
+        self._entries.clear()
+        self._generation += 1
+
+    def get_metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    async def _read_through(self, key, load, argument):
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, client = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return client
+            self._invalidate_client(client)
+        self.misses += 1
+        generation = self._generation
+        client = await resolve(load(argument))
+        if client is not None and generation == self._generation and not _in_unit_of_work.get():
+            self._store(client)
+        return client
+
+    def _store(self, client):
+        expires_at = time.monotonic() + self.ttl
+        for key in (('name', client.name), ('id', client.id)):
+            self._entries[key] = (expires_at, client)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _invalidate_client(self, client):
+        self._invalidate(('name', client.name), ('id', client.id))
+
+    def _invalidate(self, *keys):
+        for key in keys:
+            self._entries.pop(key, None)
+        self._generation += 1
+
+
+AbstractDb.register(CachedDb)
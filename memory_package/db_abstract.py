@@ -1,11 +1,27 @@
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from collections.abc import Iterator, AsyncIterator
+from inspect import isawaitable
 
 from client_package import Client, ClientInDb
 from memory_package.blocking_list import BlockingList
-from order_package import Order
+from order_package import Order, OrderStatus
+
+
+STREAM_BATCH_SIZE = 1000
 
 
 class AbstractDb(ABC):
+    @asynccontextmanager
+    async def unit_of_work(self):
+        yield
+
+    def get_pool_metrics(self) -> dict | None:
+        return None
+
+    def close(self) -> None:
+        pass
+
     @abstractmethod
     def set_new_orders_db(self, new_orders_db: BlockingList) -> None:
         pass
@@ -15,17 +31,30 @@ class AbstractDb(ABC):
         pass
 
     @abstractmethod
-    async def get_all_orders_as_dict(self) -> list[dict]:
+    async def get_all_orders_as_dict(self, limit: int | None = None, after_id: int | None = None) -> list[dict]:
+        pass
+
+    @abstractmethod
+    def stream_all_orders_as_dict(self, after_id: int | None = None) -> Iterator[dict] | AsyncIterator[dict]:
         pass
 
     @abstractmethod
     async def get_first_order_with_status(self, status_str: str) -> Order | None:
         pass
 
+    @abstractmethod
+    def get_orders_by_status(self, status: OrderStatus, limit: int | None = None,
+                             after_id: int | None = None) -> list[Order]:
+        pass
+
     @abstractmethod
     def get_order_by_id(self, order_id: int) -> Order | None:
         pass
 
+    @abstractmethod
+    def claim_order_for_processing(self, order_id: int | None = None) -> Order | None:
+        pass
+
     @abstractmethod
     def add_order(self, order) -> int:
         pass
@@ -46,12 +75,20 @@ class AbstractDb(ABC):
     def get_clients_by_ids(self, client_ids: list[int]) -> list[Client]:
         pass
 
+    @abstractmethod
+    def count_orders_by_client_ids(self, client_ids: list[int]) -> dict[int, int]:
+        pass
+
+    @abstractmethod
+    def get_order_stats(self) -> dict:
+        pass
+
     @abstractmethod
     def get_client_by_id(self, client_id: int) -> Client | None:
         pass
 
     @abstractmethod
-    def get_clients_db(self, count: int = None) -> list[ClientInDb]:
+    def get_clients_db(self, count: int = None, after_id: int | None = None) -> list[ClientInDb]:
         pass
 
     @abstractmethod
@@ -63,7 +100,15 @@ class AbstractDb(ABC):
         pass
 
     @abstractmethod
-    def remove_client(self, client: ClientInDb) -> None:
+    def remove_client(self, client: ClientInDb) -> list[int]:
+        pass
+
+    @abstractmethod
+    def remove_orders_in_id_range(self, first: int, last: int) -> list[int]:
+        pass
+
+    @abstractmethod
+    def remove_clients_in_id_range(self, first: int, last: int) -> tuple[int, list[int]]:
         pass
 
     @abstractmethod
@@ -122,12 +167,16 @@ class AbstractDb(ABC):
     def replace_order_in_client_object(self, order) -> None:
         pass
 
+    @abstractmethod
+    def set_orders_statuses(self, statuses: dict[int, OrderStatus]) -> int:
+        pass
+
     @abstractmethod
     def map_client(self, client):
         pass
 
     @abstractmethod
-    def change_client_password(self, client, password) -> None:
+    def change_client_password(self, client, hashed_password) -> None:
         pass
 
     @abstractmethod
@@ -135,5 +184,9 @@ class AbstractDb(ABC):
         pass
 
     @abstractmethod
-    def remove_all_clients_orders(self, client) -> None:
+    def remove_all_clients_orders(self, client) -> list[int]:
         pass
+
+
+async def resolve(result):
+    return await result if isawaitable(result) else result
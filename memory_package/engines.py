@@ -0,0 +1,116 @@
+import time
+from sqlalchemy import Engine, create_engine, event, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import QueuePool, NullPool, AsyncAdaptedQueuePool, SingletonThreadPool
+from memory_package.db_settings import DatabaseSettings, db_settings
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, wait_seconds: float):
+        self.checkouts += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+
+class _TimedPoolMixin:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(_TimedPoolMixin, NullPool):
+    pass
+
+
+class TimedSingletonThreadPool(_TimedPoolMixin, SingletonThreadPool):
+    pass
+
+
+def _engine_kwargs(settings: DatabaseSettings, queue_pool_class) -> dict:
+    kwargs = {"echo": settings.echo, "pool_pre_ping": settings.pool_pre_ping, "pool_recycle": settings.pool_recycle}
+    if settings.pool_class == 'null':
+        return kwargs | {"poolclass": TimedNullPool}
+    return kwargs | {"poolclass": queue_pool_class, "pool_size": settings.pool_size,
+                     "max_overflow": settings.max_overflow, "pool_timeout": settings.pool_timeout}
+
+
+def _with_metrics(engine: Engine | AsyncEngine):
+    pool = engine.pool
+    if isinstance(pool, _TimedPoolMixin):
+        pool.metrics = PoolMetrics()
+    return engine
+
+
+def create_configured_engine(url: str, settings: DatabaseSettings = db_settings) -> Engine:
+    return _with_metrics(create_engine(url, **_engine_kwargs(settings, TimedQueuePool)))
+
+
+def create_configured_async_engine(url: str, settings: DatabaseSettings = db_settings, **overrides) -> AsyncEngine:
+    kwargs = _engine_kwargs(settings, TimedAsyncAdaptedQueuePool)
+    if 'poolclass' in overrides:
+        kwargs = {key: kwargs[key] for key in ('echo', 'pool_pre_ping', 'pool_recycle')}
+    return _with_metrics(create_async_engine(url, **(kwargs | overrides)))
+
+
+def create_sqlite_engine(url: str, settings: DatabaseSettings = db_settings) -> Engine:
+    if make_url(url).database in (None, '', ':memory:'):
+        pool_kwargs = {"poolclass": TimedSingletonThreadPool, "pool_size": settings.pool_size}
+    else:
+        pool_kwargs = _engine_kwargs(settings, TimedQueuePool)
+    engine = create_engine(url, **({"echo": settings.echo} | pool_kwargs),
+                           connect_args={"check_same_thread": False})
+    pragmas = ["PRAGMA journal_mode=WAL", f"PRAGMA synchronous={settings.sqlite_synchronous}",
+               f"PRAGMA mmap_size={settings.sqlite_mmap_size}", f"PRAGMA cache_size={settings.sqlite_cache_size}",
+               f"PRAGMA busy_timeout={settings.sqlite_busy_timeout}", "PRAGMA foreign_keys=ON",
+               "PRAGMA temp_store=MEMORY"]
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return _with_metrics(engine)
+
+
+def pool_metrics(engine: Engine | AsyncEngine) -> dict:
+    pool = engine.pool
+    metrics = getattr(pool, 'metrics', None)
+    result = {"pool_class": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        result |= {"size": pool.size(), "checked_out": pool.checkedout(), "checked_in": pool.checkedin(),
+                   "overflow": pool.overflow()}
+    if metrics is not None:
+        result |= {"checkouts": metrics.checkouts, "timeouts": metrics.timeouts,
+                   "total_wait_seconds": metrics.total_wait_seconds, "max_wait_seconds": metrics.max_wait_seconds,
+                   "average_wait_seconds": metrics.total_wait_seconds / metrics.checkouts if metrics.checkouts else 0.0}
+    return result
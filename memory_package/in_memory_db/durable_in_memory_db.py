@@ -0,0 +1,269 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from client_package.client import ClientInDb
+from memory_package.blocking_list import BlockingList
+from memory_package.db_settings import db_settings
+from memory_package.in_memory_db.in_memory_db import InMemoryDb
+from memory_package.in_memory_db.order_store import OrderStore
+from memory_package.in_memory_db.persistence import (WriteAheadLog, read_log, truncate_log, remove_log,
+                                                     read_snapshot, write_snapshot)
+from memory_package.in_memory_vars import logger
+from order_package import Order, OrderStatus
+
+
+class DurableInMemoryDb(InMemoryDb):
+    def __init__(self, directory: str = db_settings.memory_persistence_dir,
+                 fsync_batch_size: int = db_settings.memory_fsync_batch_size,
+                 fsync_interval: float = db_settings.memory_fsync_interval,
+                 snapshot_every: int = db_settings.memory_snapshot_every):
+        super().__init__()
+        os.makedirs(directory, exist_ok=True)
+        self.snapshot_path = os.path.join(directory, 'snapshot.bin')
+        self.log_path = os.path.join(directory, 'operations.wal')
+        self.rotated_log_path = self.log_path + '.old'
+        self.snapshot_every = snapshot_every
+        self.snapshot_count = 0
+        self._executor: ThreadPoolExecutor | None = None
+        self._snapshot_future: Future | None = None
+        self._lsn = 0
+        self._records_since_snapshot = 0
+        self._replaying = False
+        self.recovery_seconds = self._recover()
+        self.log = WriteAheadLog(self.log_path, fsync_batch_size, fsync_interval)
+
+    def set_new_orders_db(self, new_orders_db: BlockingList):
+        super().set_new_orders_db(new_orders_db)
+        self._log('orders', list(self.orders_db.rows()))
+
+    def set_new_clients_db(self, new_clients_db: BlockingList):
+        super().set_new_clients_db(new_clients_db)
+        self._log('clients', [_client_row(client) for client in self.clients_db])
+
+    def add_order(self, order):
+        if not self.orders_db.is_blocked:
+            super().add_order(order)
+            self._log('put_order', _order_row(order))
+
+    def add_client(self, name, password, photo=str(), orders=None):
+        client_id = super().add_client(name, password, photo, orders)
+        if not self.clients_db.is_blocked:
+            self._log('put_client', _client_row(self.get_client_by_id(client_id)))
+        return client_id
+
+    def remove_order(self, order: Order):
+        if not self.orders_db.is_blocked:
+            super().remove_order(order)
+            self._log('delete_order', order.id)
+
+    def remove_client(self, client: ClientInDb):
+        removed_order_ids = super().remove_client(client)
+        if not self.clients_db.is_blocked:
+            self._log('delete_client', client.id)
+        return removed_order_ids
+
+    def remove_orders_in_id_range(self, first: int, last: int):
+        removed_ids = super().remove_orders_in_id_range(first, last)
+        if removed_ids:
+            self._log('delete_order_range', first, last)
+        return removed_ids
+
+    def remove_clients_in_id_range(self, first: int, last: int):
+        removed_count, removed_order_ids = super().remove_clients_in_id_range(first, last)
+        if removed_count:
+            self._log('delete_client_range', first, last)
+        return removed_count, removed_order_ids
+
+    def clear_db(self):
+        super().clear_db()
+        self._log('clear')
+
+    def change_order_owner(self, client_id, order_id) -> None:
+        super().change_order_owner(client_id, order_id)
+        self._log('owner', client_id, order_id)
+
+    def replace_order_in_client_object(self, order) -> None:
+        super().replace_order_in_client_object(order)
+        self._log('put_order', _order_row(order))
+
+    def set_orders_statuses(self, statuses: dict[int, OrderStatus]):
+        updated_count = super().set_orders_statuses(statuses)
+        if updated_count:
+            self._log('statuses', {order_id: OrderStatus(status).value for order_id, status in statuses.items()})
+        return updated_count
+
+    def change_client_password(self, client, hashed_password):
+        super().change_client_password(client, hashed_password)
+        self._log('password', client.id, client.password)
+
+    def update_one_client(self, client_name: str, updated_client):
+        old_client = self.get_client_by_name(client_name)
+        super().update_one_client(client_name, updated_client)
+        updated_client = self.get_client_by_id(old_client.id) if old_client is not None else None
+        if updated_client is not None:
+            self._log('put_client', _client_row(updated_client))
+
+    def close(self):
+        if self._snapshot_future is not None:
+            future = self._snapshot_future
+            future.exception()
+            self._finish_snapshot(future)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.log.close()
+
+    def get_persistence_metrics(self) -> dict:
+        return {"lsn": self._lsn, "records_since_snapshot": self._records_since_snapshot,
+                "snapshots": self.snapshot_count, "appended": self.log.appended_count,
+                "fsyncs": self.log.sync_count, "pending_fsync": self.log.pending,
+                "snapshot_in_progress": self._snapshot_future is not None,
+                "recovery_seconds": self.recovery_seconds}
+
+    def snapshot(self) -> None:
+        if self._snapshot_future is not None:
+            return
+        lsn = self._lsn
+        state = (self.orders_db.columns(), [_client_row(client) for client in self.clients_db])
+        self.log.rotate(self.rotated_log_path)
+        self._records_since_snapshot = 0
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_snapshot(lsn, state)
+            self.snapshot_count += 1
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='memory-snapshot')
+        self._snapshot_future = self._executor.submit(self._write_snapshot, lsn, state)
+        self._snapshot_future.add_done_callback(
+            lambda future: loop.call_soon_threadsafe(self._finish_snapshot, future))
+
+    def _write_snapshot(self, lsn: int, state) -> None:
+        write_snapshot(self.snapshot_path, lsn, state)
+        remove_log(self.rotated_log_path)
+
+    def _finish_snapshot(self, future: Future) -> None:
+        if self._snapshot_future is not future:
+            return
+        self._snapshot_future = None
+        if future.exception() is not None:
+            logger.error(f"Writing in-memory db snapshot failed: {future.exception()!r}")
+        else:
+            self.snapshot_count += 1
+
+    def _log(self, operation: str, *arguments) -> None:
+        if self._replaying:
+            return
+        self._lsn += 1
+        self.log.append(self._lsn, (operation, *arguments))
+        self._records_since_snapshot += 1
+        if self._records_since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def _recover(self) -> float:
+        started = time.perf_counter()
+        self._lsn, state = read_snapshot(self.snapshot_path)
+        rotated_records, rotated_length = read_log(self.rotated_log_path)
+        records, valid_length = read_log(self.log_path)
+        self._replaying = True
+        try:
+            if state is not None:
+                orders, clients = state
+                self._load_state(orders, clients)
+            for lsn, record in rotated_records + records:
+                if lsn > self._lsn:
+                    self._apply(*record)
+                    self._lsn = lsn
+                    self._records_since_snapshot += 1
+        finally:
+            self._replaying = False
+        truncate_log(self.rotated_log_path, rotated_length)
+        truncate_log(self.log_path, valid_length)
+        return time.perf_counter() - started
+
+    def _load_state(self, order_rows, client_rows) -> None:
+        self._load_orders(order_rows)
+        self._load_clients(client_rows)
+
+    def _load_orders(self, order_rows) -> None:
+        if isinstance(order_rows, dict):
+            self.orders_db = OrderStore.from_columns(order_rows)
+        else:
+            self.orders_db = OrderStore(_order_from_row(row) for row in order_rows)
+
+    def _load_clients(self, client_rows) -> None:
+        self.clients_db = BlockingList(_client_from_row(row) for row in client_rows)
+        self._rebuild_clients_indexes()
+
+    def _apply(self, operation: str, *arguments) -> None:
+        if operation == 'orders':
+            self._load_orders(arguments[0])
+        elif operation == 'clients':
+            self._load_clients(arguments[0])
+        elif operation == 'put_order':
+            self._put_order(_order_from_row(arguments[0]))
+        elif operation == 'put_client':
+            self._put_client(_client_from_row(arguments[0]))
+        elif operation == 'delete_order':
+            order = self.get_order_by_id(arguments[0])
+            if order is not None:
+                InMemoryDb.remove_order(self, order)
+        elif operation == 'delete_client':
+            client = self.get_client_by_id(arguments[0])
+            if client is not None:
+                InMemoryDb.remove_client(self, client)
+        elif operation == 'delete_order_range':
+            InMemoryDb.remove_orders_in_id_range(self, *arguments)
+        elif operation == 'delete_client_range':
+            InMemoryDb.remove_clients_in_id_range(self, *arguments)
+        elif operation == 'clear':
+            InMemoryDb.clear_db(self)
+        elif operation == 'owner':
+            InMemoryDb.change_order_owner(self, *arguments)
+        elif operation == 'statuses':
+            InMemoryDb.set_orders_statuses(self, arguments[0])
+        elif operation == 'password':
+            client = self.get_client_by_id(arguments[0])
+            if client is not None:
+                client.password = arguments[1]
+        else:
+            raise ValueError(f"Unknown in-memory db log operation: {operation}")
+
+    def _put_order(self, order: Order) -> None:
+        if order.id not in self.orders_db:
+            InMemoryDb.add_order(self, order)
+        else:
+            InMemoryDb.replace_order_in_client_object(self, order)
+
+    def _put_client(self, client: ClientInDb) -> None:
+        indexed_client = self.get_client_by_id(client.id)
+        if indexed_client is None:
+            self.clients_db.append(client)
+            self._index_client(client)
+            return
+        self.clients_db[self.clients_db.index(indexed_client)] = client
+        self._unindex_client(indexed_client)
+        self._index_client(client)
+
+
+def _order_row(order) -> tuple:
+    return order.id, order.description, order.time, OrderStatus(order.status).value, order.client_id, \
+        order.creation_date
+
+
+def _order_from_row(row) -> Order:
+    order_id, description, order_time, status, client_id, creation_date = row
+    return Order(id=order_id, description=description, time=order_time, status=status, client_id=client_id,
+                 creation_date=creation_date)
+
+
+def _client_row(client) -> tuple:
+    return client.id, client.name, client.password, client.photo
+
+
+def _client_from_row(row) -> ClientInDb:
+    client_id, name, password, photo = row
+    return ClientInDb(id=client_id, name=name, password=password, photo=photo)
@@ -1,75 +1,153 @@
-import copy
+from bisect import bisect_left, bisect_right, insort
 
-from client_management_package.main.passwords import hash_password
 from client_package.client import ClientInDb, Client
 from memory_package.blocking_list import BlockingList
-from memory_package import AbstractDb
-from order_package import Order
+from memory_package.db_abstract import AbstractDb, STREAM_BATCH_SIZE
+from memory_package.in_memory_db.order_store import OrderStore
+from order_package import Order, OrderStatus
 from memory_package.in_memory_vars import orders_lock
 
 
 class InMemoryDb(AbstractDb):
     def __init__(self):
-        self.orders_db = BlockingList()
+        self.orders_db = OrderStore()
         self.clients_db = BlockingList()
+        self._clients_by_id: dict[int, ClientInDb] = {}
+        self._client_ids: list[int] = []
+        self._clients_by_name: dict[str, dict[int, ClientInDb]] = {}
 
-    def set_new_orders_db(self, new_orders_db: BlockingList):
-        self.orders_db = copy.deepcopy(new_orders_db)
+    def set_new_orders_db(self, new_orders_db: BlockingList | OrderStore):
+        self.orders_db = new_orders_db if isinstance(new_orders_db, OrderStore) else OrderStore(new_orders_db)
 
     def set_new_clients_db(self, new_clients_db: BlockingList):
-        self.clients_db = copy.deepcopy(new_clients_db)
-
-    async def get_all_orders_as_dict(self):
-        async with orders_lock:
-            return [order.model_dump() for order in self.orders_db]
+        self.clients_db = new_clients_db if isinstance(new_clients_db, BlockingList) else BlockingList(new_clients_db)
+        self._rebuild_clients_indexes()
+
+    async def get_all_orders_as_dict(self, limit: int | None = None, after_id: int | None = None):
+        async with orders_lock.reading():
+            start = self.orders_db.first_row_after(after_id)
+            stop = min(start + limit, len(self.orders_db)) if limit else len(self.orders_db)
+            return [self.orders_db.dict_at(row) for row in range(start, stop)]
+
+    async def stream_all_orders_as_dict(self, after_id: int | None = None):
+        while True:
+            async with orders_lock.reading():
+                start = self.orders_db.first_row_after(after_id)
+                page = [self.orders_db.dict_at(row)
+                        for row in range(start, min(start + STREAM_BATCH_SIZE, len(self.orders_db)))]
+            if not page:
+                return
+            for order in page:
+                yield order
+            after_id = page[-1]['id']
 
     async def get_first_order_with_status(self, status_str: str):
-        async with orders_lock:
-            return next((order for order in self.orders_db if order.status.value == status_str), None)
+        async with orders_lock.reading():
+            rows = self.orders_db.rows_with_status(OrderStatus(status_str), limit=1)
+            return self.orders_db.order_at(rows[0]) if rows else None
+
+    def get_orders_by_status(self, status: OrderStatus, limit: int | None = None, after_id: int | None = None):
+        rows = self.orders_db.rows_with_status(status, self.orders_db.first_row_after(after_id), limit)
+        return [self.orders_db.order_at(row) for row in rows]
 
     def get_order_by_id(self, order_id: int):
-        return next((order for order in self.orders_db if order.id == order_id), None)
+        return self.orders_db.get(order_id)
+
+    def claim_order_for_processing(self, order_id: int | None = None):
+        if order_id is None:
+            rows = self.orders_db.rows_with_status(OrderStatus.received, limit=1)
+            order = self.orders_db.order_at(rows[0]) if rows else None
+        else:
+            order = self.get_order_by_id(order_id)
+        if order is None or order.status != OrderStatus.received:
+            return None
+        order.status = OrderStatus.in_progress
+        self.replace_order_in_client_object(order)
+        return order
 
     def add_order(self, order):
-        self.orders_db.append(order)
+        if self.orders_db.is_blocked:
+            return
+        self.orders_db.put(order)
 
     def add_client(self, name, password, photo=str(), orders=None):
         client_id = self.get_next_client_id()
-        self.clients_db.append(ClientInDb(name=name, photo=photo, password=password,
-                                          orders=orders if orders else [], id=client_id))
+        if self.clients_db.is_blocked:
+            return client_id
+        client = ClientInDb(name=name, photo=photo, password=password, id=client_id)
+        self.clients_db.append(client)
+        self._index_client(client)
         return client_id
 
     def add_order_to_client(self, order, client):
-        if client and order:
-            client.orders.append(order)
+        pass
 
     def get_client_by_name(self, full_name: str):
-        return next((client for client in self.clients_db if client.name == full_name), None)
+        same_name_clients = self._clients_by_name.get(full_name)
+        return next(iter(same_name_clients.values())) if same_name_clients else None
 
     def get_clients_by_ids(self, client_ids: list[int]):
-        return [client for client in self.clients_db if client.id in client_ids]
+        clients = (self._clients_by_id.get(client_id) for client_id in set(client_ids))
+        return sorted((client for client in clients if client is not None), key=lambda client: client.id)
+
+    def count_orders_by_client_ids(self, client_ids: list[int]):
+        return {client_id: len(self.orders_db.ids_of_client(client_id))
+                for client_id in sorted(set(client_ids)) if client_id in self._clients_by_id}
+
+    def get_order_stats(self):
+        return {**self.orders_db.stats.as_dict(), "clients": len(self.clients_db)}
 
     def get_client_by_id(self, client_id: int):
-        return self.get_clients_by_ids([client_id])[0] if self.get_clients_by_ids([client_id]) else None
+        return self._clients_by_id.get(client_id)
 
-    def get_clients_db(self, count: int = None):
-        return self.clients_db[:count] if count else self.clients_db
+    def get_clients_db(self, count: int = None, after_id: int | None = None):
+        if after_id is not None:
+            clients = [self._clients_by_id[client_id] for client_id in _page_of_ids(self._client_ids, count, after_id)]
+        else:
+            clients = self.clients_db[:count] if count else self.clients_db
+        return [client.model_copy(update={"orders": self.get_orders_by_client_id(client.id)}) for client in clients]
 
     def get_orders_db(self):
-        return self.orders_db
+        return list(self.orders_db)
 
     def remove_order(self, order: Order):
-        self.orders_db.remove(order)
+        if self.orders_db.is_blocked:
+            return
+        self.orders_db.remove(order.id)
 
     def remove_client(self, client: ClientInDb):
-        self.remove_all_clients_orders(client)
+        removed_order_ids = self.remove_all_clients_orders(client)
+        if self.clients_db.is_blocked:
+            return removed_order_ids
         self.clients_db.remove(client)
+        self._unindex_client(client)
+        return removed_order_ids
+
+    def remove_orders_in_id_range(self, first: int, last: int):
+        if self.orders_db.is_blocked:
+            return []
+        return [order_id for order_id, _ in self.orders_db.remove_rows(self.orders_db.rows_in_id_range(first, last))]
+
+    def remove_clients_in_id_range(self, first: int, last: int):
+        if self.clients_db.is_blocked:
+            return 0, []
+        removed_clients = [self._clients_by_id[client_id]
+                           for client_id in _ids_in_range(self._client_ids, first, last)]
+        removed_order_ids = []
+        if not self.orders_db.is_blocked:
+            for client in removed_clients:
+                removed_order_ids.extend(self._remove_client_orders(client))
+        removed_ids = {client.id for client in removed_clients}
+        self.clients_db[:] = [client for client in self.clients_db if client.id not in removed_ids]
+        for client in removed_clients:
+            self._unindex_client(client)
+        return len(removed_clients), removed_order_ids
 
     def get_next_order_id(self):
-        return 1 if len(self.get_orders_db()) == 0 else max(self.get_orders_db(), key=lambda order: order.id).id + 1
+        return self.orders_db.ids[-1] + 1 if self.orders_db.ids else 1
 
     def get_next_client_id(self):
-        return 1 if len(self.get_clients_db()) == 0 else max(self.get_clients_db(), key=lambda client: client.id).id + 1
+        return self._client_ids[-1] + 1 if self._client_ids else 1
 
     def get_clients_count(self):
         return len(self.clients_db)
@@ -82,16 +160,18 @@ class InMemoryDb(AbstractDb):
         return client.password if client else None
 
     def get_orders_by_client_id(self, client_id: int):
-        clients = self.get_clients_by_ids([client_id])
-        return clients[0].orders if len(clients) > 0 else None
+        if self.get_client_by_id(client_id) is None:
+            return None
+        return [self.orders_db.get(order_id) for order_id in self.orders_db.ids_of_client(client_id)]
 
     def get_orders_by_client_name(self, client_name: str):
         client = self.get_client_by_name(client_name)
-        return client.orders if client else None
+        return self.get_orders_by_client_id(client.id) if client else None
 
     def clear_db(self):
         self.orders_db.clear()
         self.clients_db.clear()
+        self._rebuild_clients_indexes()
 
     def open_dbs(self):
         self.orders_db.unblock()
@@ -102,35 +182,81 @@ class InMemoryDb(AbstractDb):
         self.clients_db.block()
 
     def remove_order_from_client(self, client, order) -> None:
-        client.orders.remove(order)
+        pass
 
     def change_order_owner(self, client_id, order_id) -> None:
-        order = self.get_order_by_id(order_id)
-        order.client_id = client_id
+        self.orders_db.set_client_id(order_id, client_id)
 
     def get_client_id_from_client_by_name(self, client_name) -> int:
         client = self.get_client_by_name(client_name)
         return client.id if client else None
 
     def replace_order_in_client_object(self, order) -> None:
-        for client in self.get_clients_db():
-            if client.id == order.client_id:
-                for i, c_order in enumerate(client.orders):
-                    if c_order.id == order.id:
-                        client.orders[i] = order
+        self.orders_db.update(order)
+
+    def set_orders_statuses(self, statuses: dict[int, OrderStatus]):
+        return sum(self.orders_db.set_status(order_id, status) for order_id, status in statuses.items())
 
     def map_client(self, client):
-        return Client.model_validate(client).model_dump()
+        client_data = Client.model_validate(client).model_dump()
+        stored_client = self.get_client_by_name(client.name)
+        if stored_client is not None:
+            client_data['orders'] = [order.model_dump() for order in self.get_orders_by_client_id(stored_client.id)]
+        return client_data
 
-    def change_client_password(self, client, password):
-        client.password = hash_password(password) if password is not None else client.password
+    def change_client_password(self, client, hashed_password):
+        client.password = hashed_password if hashed_password is not None else client.password
 
     def update_one_client(self, client_name: str, updated_client):
-        for i, client in enumerate(self.clients_db):
-            if client.name == client_name:
-                self.clients_db[i] = updated_client
-        self.set_new_clients_db(BlockingList(self.clients_db))
-
-    def remove_all_clients_orders(self, client) -> None:
-        for order in client.orders:
-            self.remove_order(order)
+        old_client = self.get_client_by_name(client_name)
+        if old_client is None:
+            return
+        if not isinstance(updated_client, ClientInDb):
+            updated_client = ClientInDb(id=old_client.id, name=updated_client.name, password=updated_client.password,
+                                        photo=updated_client.photo)
+        self.clients_db[self.clients_db.index(old_client)] = updated_client
+        if updated_client.name != old_client.name:
+            self._unindex_client(old_client)
+        self._index_client(updated_client)
+
+    def remove_all_clients_orders(self, client) -> list[int]:
+        return self._remove_client_orders(client) if not self.orders_db.is_blocked else []
+
+    def _remove_client_orders(self, client) -> list[int]:
+        return [order_id for order_id, _ in self.orders_db.remove_ids(list(self.orders_db.ids_of_client(client.id)))]
+
+    def _index_client(self, client) -> None:
+        if client.id not in self._clients_by_id:
+            insort(self._client_ids, client.id)
+        self._clients_by_id[client.id] = client
+        self._clients_by_name.setdefault(client.name, {})[client.id] = client
+
+    def _unindex_client(self, client) -> None:
+        if self._clients_by_id.pop(client.id, None) is not None:
+            _remove_id(self._client_ids, client.id)
+        same_name_clients = self._clients_by_name.get(client.name)
+        if same_name_clients is not None and same_name_clients.pop(client.id, None) is not None \
+                and not same_name_clients:
+            del self._clients_by_name[client.name]
+
+    def _rebuild_clients_indexes(self) -> None:
+        self._clients_by_id = {}
+        self._client_ids = []
+        self._clients_by_name = {}
+        for client in self.clients_db:
+            self._index_client(client)
+
+
+def _ids_in_range(sorted_ids: list[int], first: int, last: int) -> list[int]:
+    return sorted_ids[bisect_left(sorted_ids, first):bisect_right(sorted_ids, last)]
+
+
+def _page_of_ids(sorted_ids: list[int], limit: int | None = None, after_id: int | None = None) -> list[int]:
+    start = bisect_right(sorted_ids, after_id) if after_id is not None else 0
+    return sorted_ids[start:start + limit] if limit else sorted_ids[start:]
+
+
+def _remove_id(sorted_ids: list[int], removed_id: int) -> None:
+    index = bisect_left(sorted_ids, removed_id)
+    if index < len(sorted_ids) and sorted_ids[index] == removed_id:
+        del sorted_ids[index]
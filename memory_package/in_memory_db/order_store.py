@@ -0,0 +1,316 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+
+from memory_package.order_stats import OrderStats
+from order_package import Order, OrderStatus
+
+NO_CLIENT = -2 ** 63
+NAIVE = -2 ** 31
+STATUSES = tuple(OrderStatus)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class OrderStore:
+    def __init__(self, orders=None):
+        self._is_blocked = False
+        self.clear()
+        for order in orders or ():
+            self.put(order)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return (self.order_at(row) for row in range(len(self.ids)))
+
+    def __contains__(self, order_id: int):
+        return self.row_of(order_id) is not None
+
+    def block(self):
+        self._is_blocked = True
+
+    def unblock(self):
+        self._is_blocked = False
+
+    @property
+    def is_blocked(self):
+        return self._is_blocked
+
+    def clear(self) -> None:
+        self.ids = array('q')
+        self.times = array('q')
+        self.statuses = bytearray()
+        self.client_ids = array('q')
+        self.creation_dates = array('q')
+        self.utc_offsets = array('i')
+        self.description_codes = array('I')
+        self._descriptions: list[str] = []
+        self._description_codes: dict[str, int] = {}
+        self._ids_by_client: dict[int, array] = {}
+        self._ids_by_status: list[array] = [array('q') for _ in STATUSES]
+        self.stats = OrderStats()
+
+    def row_of(self, order_id: int) -> int | None:
+        row = bisect_left(self.ids, order_id)
+        return row if row < len(self.ids) and self.ids[row] == order_id else None
+
+    def first_row_after(self, after_id: int | None) -> int:
+        return bisect_right(self.ids, after_id) if after_id is not None else 0
+
+    def rows_in_id_range(self, first: int, last: int) -> range:
+        return range(bisect_left(self.ids, first), bisect_right(self.ids, last))
+
+    def rows_with_status(self, status: OrderStatus, start: int = 0, limit: int | None = None) -> list[int]:
+        if start >= len(self.ids):
+            return []
+        order_ids = self._ids_by_status[STATUS_CODES[OrderStatus(status)]]
+        first = bisect_left(order_ids, self.ids[start])
+        stop = first + limit if limit is not None else len(order_ids)
+        return [self.row_of(order_id) for order_id in order_ids[first:stop]]
+
+    def ids_of_client(self, client_id: int) -> array:
+        return self._ids_by_client.get(client_id, array('q'))
+
+    def get(self, order_id: int) -> Order | None:
+        row = self.row_of(order_id)
+        return self.order_at(row) if row is not None else None
+
+    def status_of(self, order_id: int) -> OrderStatus | None:
+        row = self.row_of(order_id)
+        return STATUSES[self.statuses[row]] if row is not None else None
+
+    def order_at(self, row: int) -> Order:
+        return Order.model_validate(self.dict_at(row))
+
+    def dict_at(self, row: int) -> dict:
+        return {"id": self.ids[row], "description": self._descriptions[self.description_codes[row]],
+                "time": self.times[row], "status": STATUSES[self.statuses[row]], "client_id": self._client_at(row),
+                "creation_date": _datetime_from_columns(self.creation_dates[row], self.utc_offsets[row])}
+
+    def rows(self):
+        for row in range(len(self.ids)):
+            yield (self.ids[row], self._descriptions[self.description_codes[row]], self.times[row],
+                   STATUSES[self.statuses[row]].value, self._client_at(row),
+                   _datetime_from_columns(self.creation_dates[row], self.utc_offsets[row]))
+
+    def columns(self) -> dict:
+        return {"ids": self.ids[:], "times": self.times[:], "statuses": bytes(self.statuses),
+                "client_ids": self.client_ids[:], "creation_dates": self.creation_dates[:],
+                "utc_offsets": self.utc_offsets[:], "description_codes": self.description_codes[:],
+                "descriptions": list(self._descriptions)}
+
+    @classmethod
+    def from_columns(cls, columns: dict) -> 'OrderStore':
+        store = cls()
+        store.ids, store.times, store.client_ids = columns['ids'], columns['times'], columns['client_ids']
+        store.statuses = bytearray(columns['statuses'])
+        store.creation_dates, store.utc_offsets = columns['creation_dates'], columns['utc_offsets']
+        store.description_codes = columns['description_codes']
+        store._descriptions = columns['descriptions']
+        store._description_codes = {description: code for code, description in enumerate(store._descriptions)}
+        for row in range(len(store.ids)):
+            store._link(store._client_at(row), store.ids[row])
+            store.stats.order_added(STATUSES[store.statuses[row]], store.times[row])
+        for code in range(len(STATUSES)):
+            order_ids = store._ids_by_status[code]
+            row = store.statuses.find(code)
+            while row != -1:
+                order_ids.append(store.ids[row])
+                row = store.statuses.find(code, row + 1)
+        return store
+
+    def put(self, order) -> None:
+        row = bisect_left(self.ids, order.id)
+        if row < len(self.ids) and self.ids[row] == order.id:
+            self.update(order)
+            return
+        creation_date, utc_offset = _datetime_to_columns(order.creation_date)
+        self.ids.insert(row, order.id)
+        self.times.insert(row, order.time)
+        self.statuses.insert(row, STATUS_CODES[OrderStatus(order.status)])
+        self.client_ids.insert(row, _client_column(order.client_id))
+        self.creation_dates.insert(row, creation_date)
+        self.utc_offsets.insert(row, utc_offset)
+        self.description_codes.insert(row, self._intern(order.description))
+        self._link(order.client_id, order.id)
+        _insert_id(self._ids_by_status[self.statuses[row]], order.id)
+        self.stats.order_added(order.status, order.time)
+
+    def update(self, order) -> bool:
+        row = self.row_of(order.id)
+        if row is None:
+            return False
+        self.stats.order_replaced(STATUSES[self.statuses[row]], self.times[row], order.status, order.time)
+        self.times[row] = order.time
+        self._set_status_at(row, order.status)
+        self.creation_dates[row], self.utc_offsets[row] = _datetime_to_columns(order.creation_date)
+        self.description_codes[row] = self._intern(order.description)
+        self._set_client_id_at(row, order.client_id)
+        return True
+
+    def set_status(self, order_id: int, status: OrderStatus) -> bool:
+        row = self.row_of(order_id)
+        if row is None:
+            return False
+        self.stats.status_changed(STATUSES[self.statuses[row]], status)
+        self._set_status_at(row, status)
+        return True
+
+    def set_client_id(self, order_id: int, client_id: int | None) -> bool:
+        row = self.row_of(order_id)
+        if row is None:
+            return False
+        self._set_client_id_at(row, client_id)
+        return True
+
+    def remove(self, order_id: int) -> bool:
+        row = self.row_of(order_id)
+        if row is None:
+            return False
+        self._delete_rows(row, row + 1)
+        return True
+
+    def remove_rows(self, rows: range) -> list[tuple[int, int | None]]:
+        removed = [(self.ids[row], self._client_at(row)) for row in rows]
+        self._delete_rows(rows.start, rows.stop)
+        return removed
+
+    def remove_ids(self, order_ids) -> list[tuple[int, int | None]]:
+        rows = sorted({row for row in map(self.row_of, order_ids) if row is not None})
+        removed = [(self.ids[row], self._client_at(row)) for row in rows]
+        if rows and rows[-1] - rows[0] + 1 == len(rows):
+            self._delete_rows(rows[0], rows[-1] + 1)
+        elif rows:
+            self._compact(rows)
+        return removed
+
+    def memory_usage(self) -> int:
+        columns = (self.ids, self.times, self.client_ids, self.creation_dates, self.utc_offsets,
+                   self.description_codes)
+        return sum(column.itemsize * len(column) for column in columns) + len(self.statuses) \
+            + sum(len(description) for description in self._descriptions) \
+            + sum(column.itemsize * len(column) for column in self._ids_by_client.values()) \
+            + sum(column.itemsize * len(column) for column in self._ids_by_status)
+
+    def _delete_rows(self, start: int, stop: int) -> None:
+        if start >= stop:
+            return
+        self._unlink_rows(range(start, stop))
+        self._count_removed(range(start, stop))
+        for order_ids in self._ids_by_status:
+            del order_ids[bisect_left(order_ids, self.ids[start]):bisect_right(order_ids, self.ids[stop - 1])]
+        for column in (self.ids, self.times, self.statuses, self.client_ids, self.creation_dates,
+                       self.utc_offsets, self.description_codes):
+            del column[start:stop]
+
+    def _compact(self, removed_rows: list[int]) -> None:
+        self._unlink_rows(removed_rows)
+        self._count_removed(removed_rows)
+        removed_ids = {self.ids[row] for row in removed_rows}
+        self._ids_by_status = [array('q', (order_id for order_id in order_ids if order_id not in removed_ids))
+                               for order_ids in self._ids_by_status]
+        kept_runs = list(zip([-1] + removed_rows, removed_rows + [len(self.ids)]))
+        self.ids, self.times, self.client_ids, self.creation_dates, self.utc_offsets, self.description_codes = (
+            _kept_array(column, kept_runs) for column in (
+                self.ids, self.times, self.client_ids, self.creation_dates, self.utc_offsets, self.description_codes))
+        self.statuses = bytearray(_kept_bytes(self.statuses, 1, kept_runs))
+
+    def _count_removed(self, rows) -> None:
+        for row in rows:
+            self.stats.order_removed(STATUSES[self.statuses[row]], self.times[row])
+
+    def _set_status_at(self, row: int, status: OrderStatus) -> None:
+        old_code, code = self.statuses[row], STATUS_CODES[OrderStatus(status)]
+        if old_code != code:
+            _remove_id(self._ids_by_status[old_code], self.ids[row])
+            _insert_id(self._ids_by_status[code], self.ids[row])
+            self.statuses[row] = code
+
+    def _client_at(self, row: int) -> int | None:
+        client_id = self.client_ids[row]
+        return client_id if client_id != NO_CLIENT else None
+
+    def _set_client_id_at(self, row: int, client_id: int | None) -> None:
+        old_client_id = self._client_at(row)
+        if old_client_id != client_id:
+            self._unlink(old_client_id, self.ids[row])
+            self.client_ids[row] = _client_column(client_id)
+            self._link(client_id, self.ids[row])
+
+    def _link(self, client_id: int | None, order_id: int) -> None:
+        if client_id is None:
+            return
+        _insert_id(self._ids_by_client.setdefault(client_id, array('q')), order_id)
+
+    def _unlink(self, client_id: int | None, order_id: int) -> None:
+        order_ids = self._ids_by_client.get(client_id)
+        if order_ids is None:
+            return
+        _remove_id(order_ids, order_id)
+        if not order_ids:
+            del self._ids_by_client[client_id]
+
+    def _unlink_rows(self, rows) -> None:
+        removed_ids_by_client: dict[int, set[int]] = {}
+        for row in rows:
+            client_id = self._client_at(row)
+            if client_id is not None:
+                removed_ids_by_client.setdefault(client_id, set()).add(self.ids[row])
+        for client_id, removed_ids in removed_ids_by_client.items():
+            order_ids = self._ids_by_client.get(client_id)
+            if order_ids is None:
+                continue
+            order_ids = array('q', (order_id for order_id in order_ids if order_id not in removed_ids))
+            if order_ids:
+                self._ids_by_client[client_id] = order_ids
+            else:
+                del self._ids_by_client[client_id]
+
+    def _intern(self, description: str) -> int:
+        code = self._description_codes.get(description)
+        if code is None:
+            code = self._description_codes[description] = len(self._descriptions)
+            self._descriptions.append(description)
+        return code
+
+
+def _kept_bytes(column, item_size: int, kept_runs: list[tuple[int, int]]) -> bytes:
+    with memoryview(column).cast('B') as view:
+        return b''.join(view[(previous + 1) * item_size:removed * item_size] for previous, removed in kept_runs)
+
+
+def _kept_array(column: array, kept_runs: list[tuple[int, int]]) -> array:
+    kept = array(column.typecode)
+    kept.frombytes(_kept_bytes(column, column.itemsize, kept_runs))
+    return kept
+
+
+def _insert_id(order_ids: array, order_id: int) -> None:
+    if not order_ids or order_ids[-1] < order_id:
+        order_ids.append(order_id)
+    else:
+        order_ids.insert(bisect_left(order_ids, order_id), order_id)
+
+
+def _remove_id(order_ids: array, order_id: int) -> None:
+    index = bisect_left(order_ids, order_id)
+    if index < len(order_ids) and order_ids[index] == order_id:
+        del order_ids[index]
+
+
+def _client_column(client_id: int | None) -> int:
+    return client_id if client_id is not None else NO_CLIENT
+
+
+def _datetime_to_columns(value: datetime) -> tuple[int, int]:
+    offset = value.utcoffset()
+    utc_offset = NAIVE if offset is None else int(offset.total_seconds())
+    return (value.replace(tzinfo=None) - EPOCH) // MICROSECOND, utc_offset
+
+
+def _datetime_from_columns(microseconds: int, utc_offset: int) -> datetime:
+    value = EPOCH + timedelta(microseconds=microseconds)
+    return value if utc_offset == NAIVE else value.replace(tzinfo=timezone(timedelta(seconds=utc_offset)))
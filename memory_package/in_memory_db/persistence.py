@@ -0,0 +1,143 @@
+import asyncio
+import mmap
+import os
+import pickle
+import struct
+import time
+import zlib
+
+RECORD_HEADER = struct.Struct('<QII')
+SNAPSHOT_MAGIC = b'IMDBSNP1'
+SNAPSHOT_HEADER = struct.Struct('<8sQI')
+
+
+class WriteAheadLog:
+    def __init__(self, path: str, fsync_batch_size: int, fsync_interval: float):
+        self.path = path
+        self.fsync_batch_size = fsync_batch_size
+        self.fsync_interval = fsync_interval
+        self._file = open(path, 'ab')
+        self._last_sync = time.monotonic()
+        self._sync_handle: asyncio.TimerHandle | None = None
+        self.pending = 0
+        self.appended_count = 0
+        self.sync_count = 0
+
+    def append(self, lsn: int, record: tuple) -> None:
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        self._file.write(RECORD_HEADER.pack(lsn, len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+        self._file.flush()
+        self.pending += 1
+        self.appended_count += 1
+        if self.pending >= self.fsync_batch_size or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+        elif self._sync_handle is None:
+            self._schedule_sync()
+
+    def sync(self) -> None:
+        if self._sync_handle is not None:
+            self._sync_handle.cancel()
+            self._sync_handle = None
+        if self.pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.pending = 0
+            self.sync_count += 1
+        self._last_sync = time.monotonic()
+
+    def rotate(self, rotated_path: str) -> None:
+        self.sync()
+        self._file.close()
+        if os.path.exists(rotated_path):
+            with open(self.path, 'rb') as source, open(rotated_path, 'ab') as target:
+                target.write(source.read())
+                target.flush()
+                os.fsync(target.fileno())
+            os.remove(self.path)
+        else:
+            os.replace(self.path, rotated_path)
+        self._file = open(self.path, 'ab')
+        _fsync_directory(os.path.dirname(self.path))
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def _schedule_sync(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        delay = max(self.fsync_interval - (time.monotonic() - self._last_sync), 0)
+        self._sync_handle = loop.call_later(delay, self._timed_sync)
+
+    def _timed_sync(self) -> None:
+        self._sync_handle = None
+        if not self._file.closed:
+            self.sync()
+
+
+def read_log(path: str) -> tuple[list[tuple[int, tuple]], int]:
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return [], 0
+    records = []
+    valid_length = 0
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        while valid_length + RECORD_HEADER.size <= len(mapped):
+            lsn, length, checksum = RECORD_HEADER.unpack_from(mapped, valid_length)
+            start = valid_length + RECORD_HEADER.size
+            payload = mapped[start:start + length]
+            if len(payload) != length or zlib.crc32(payload) != checksum:
+                break
+            records.append((lsn, pickle.loads(payload)))
+            valid_length = start + length
+    return records, valid_length
+
+
+def truncate_log(path: str, length: int) -> None:
+    if os.path.exists(path) and os.path.getsize(path) > length:
+        with open(path, 'r+b') as file:
+            file.truncate(length)
+            os.fsync(file.fileno())
+
+
+def remove_log(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+        _fsync_directory(os.path.dirname(path))
+
+
+def write_snapshot(path: str, lsn: int, state) -> None:
+    payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, lsn, zlib.crc32(payload)))
+        file.write(payload)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+    _fsync_directory(os.path.dirname(path))
+
+
+def read_snapshot(path: str):
+    if not os.path.exists(path) or os.path.getsize(path) < SNAPSHOT_HEADER.size:
+        return 0, None
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        magic, lsn, checksum = SNAPSHOT_HEADER.unpack_from(mapped, 0)
+        payload = memoryview(mapped)[SNAPSHOT_HEADER.size:]
+        try:
+            if magic != SNAPSHOT_MAGIC or zlib.crc32(payload) != checksum:
+                raise ValueError(f"Corrupted in-memory db snapshot: {path}")
+            return lsn, pickle.loads(payload)
+        finally:
+            payload.release()
+
+
+def _fsync_directory(directory: str) -> None:
+    descriptor = os.open(directory or '.', os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
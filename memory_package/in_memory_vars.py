@@ -1,9 +1,10 @@
 import asyncio
 import logging
+from memory_package.read_write_lock import ReadWriteLock
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-orders_lock = asyncio.Lock()
+orders_lock = ReadWriteLock()
 calls_count = 0
 calls_lock = asyncio.Lock()
 
@@ -0,0 +1,80 @@
+import time
+from collections import Counter
+from math import ceil
+
+from order_package import OrderStatus
+
+PERCENTILES = (50, 90, 99)
+
+
+class OrderStats:
+    def __init__(self, reconcile_interval: float | None = None):
+        self.reconcile_interval = reconcile_interval
+        self.reconciliations = 0
+        self._reconciled_at: float | None = None
+        self.reset()
+
+    def reset(self, clients: int = 0) -> None:
+        self.clients = clients
+        self.orders_by_status = {status: 0 for status in OrderStatus}
+        self.time_counts: Counter[int] = Counter()
+        self.time_total = 0
+
+    @property
+    def orders(self) -> int:
+        return sum(self.orders_by_status.values())
+
+    def order_added(self, status: OrderStatus, order_time: int, count: int = 1) -> None:
+        self.orders_by_status[OrderStatus(status)] += count
+        self.time_counts[order_time] += count
+        self.time_total += order_time * count
+
+    def order_removed(self, status: OrderStatus, order_time: int) -> None:
+        self.orders_by_status[OrderStatus(status)] -= 1
+        self.time_total -= order_time
+        self.time_counts[order_time] -= 1
+        if self.time_counts[order_time] <= 0:
+            del self.time_counts[order_time]
+
+    def order_replaced(self, old_status: OrderStatus, old_time: int, status: OrderStatus, order_time: int) -> None:
+        self.order_removed(old_status, old_time)
+        self.order_added(status, order_time)
+
+    def status_changed(self, old_status: OrderStatus, status: OrderStatus) -> None:
+        self.orders_by_status[OrderStatus(old_status)] -= 1
+        self.orders_by_status[OrderStatus(status)] += 1
+
+    def client_added(self) -> None:
+        self.clients += 1
+
+    def mark_stale(self) -> None:
+        self._reconciled_at = None
+
+    def needs_reconcile(self) -> bool:
+        return self._reconciled_at is None or (self.reconcile_interval is not None and
+                                               time.monotonic() - self._reconciled_at >= self.reconcile_interval)
+
+    def load(self, rows, clients: int) -> None:
+        self.reset(clients)
+        for status, order_time, count in rows:
+            self.order_added(status, order_time, count)
+        self._reconciled_at = time.monotonic()
+        self.reconciliations += 1
+
+    def percentile(self, percent: int) -> int | None:
+        orders = self.orders
+        if not orders:
+            return None
+        rank = max(ceil(percent / 100 * orders), 1)
+        seen = 0
+        for order_time in sorted(self.time_counts):
+            seen += self.time_counts[order_time]
+            if seen >= rank:
+                return order_time
+
+    def as_dict(self) -> dict:
+        orders = self.orders
+        return {"orders": orders, "clients": self.clients,
+                "orders_by_status": {status.value: count for status, count in self.orders_by_status.items()},
+                "time": {"average": self.time_total / orders if orders else None,
+                         **{f"p{percent}": self.percentile(percent) for percent in PERCENTILES}}}
@@ -0,0 +1,81 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class ReadWriteLock:
+    def __init__(self):
+        self._readers = 0
+        self._writer = False
+        self._waiters: deque[tuple[bool, asyncio.Future]] = deque()
+
+    async def __aenter__(self):
+        await self._acquire(writer=True)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._release(writer=True)
+
+    @asynccontextmanager
+    async def reading(self):
+        await self._acquire(writer=False)
+        try:
+            yield
+        finally:
+            self._release(writer=False)
+
+    @asynccontextmanager
+    async def writing(self):
+        async with self:
+            yield
+
+    @property
+    def readers(self) -> int:
+        return self._readers
+
+    def locked(self) -> bool:
+        return self._writer
+
+    async def _acquire(self, writer: bool) -> None:
+        if not self._waiters and self._can_enter(writer):
+            self._enter(writer)
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((writer, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(writer)
+            else:
+                self._wake()
+            raise
+
+    def _release(self, writer: bool) -> None:
+        if writer:
+            self._writer = False
+        else:
+            self._readers -= 1
+        self._wake()
+
+    def _can_enter(self, writer: bool) -> bool:
+        return not self._writer and (not writer or self._readers == 0)
+
+    def _enter(self, writer: bool) -> None:
+        if writer:
+            self._writer = True
+        else:
+            self._readers += 1
+
+    def _wake(self) -> None:
+        while self._waiters:
+            writer, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if not self._can_enter(writer):
+                return
+            self._waiters.popleft()
+            self._enter(writer)
+            future.set_result(None)
+            if writer:
+                return
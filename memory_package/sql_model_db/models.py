@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Enum
+from sqlalchemy import Column, Enum, Index
 from sqlmodel import SQLModel, Field, Relationship
 
 from order_package import OrderStatus
@@ -15,10 +15,11 @@ class Client(SQLModel, table=True):
 
 class Order(SQLModel, table=True):
     __tablename__ = "orders"
+    __table_args__ = (Index('ix_orders_status_id', 'status', 'id'),)
     id: int | None = Field(default=None, primary_key=True)
     description: str = Field(unique=True)
     time: int = Field(default=60)
     status: OrderStatus = Field(sa_column=Column(Enum(OrderStatus), default=OrderStatus.received))
-    client_id: int | None = Field(default=None, foreign_key="client.id", ondelete='CASCADE')
+    client_id: int | None = Field(default=None, foreign_key="client.id", ondelete='CASCADE', index=True)
     creation_date: datetime = Field(default=datetime.now())
     client: Client | None = Relationship(back_populates="orders")
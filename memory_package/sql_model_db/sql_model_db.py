@@ -1,23 +1,40 @@
-from copy import deepcopy
-
-from sqlalchemy import func
+from sqlalchemy import Engine, func
+from sqlalchemy.orm import selectinload
 from sqlmodel import SQLModel, Session, select, col
-from client_management_package.main.passwords import hash_password
 from client_package import ClientInDb
+from order_package import OrderStatus
 from .models import Order, Client
 from .db import engine
-from memory_package import AbstractDb
+from memory_package.db_abstract import AbstractDb, STREAM_BATCH_SIZE
 from ..blocking_list import BlockingList
+from ..unit_of_work import current_bind, unit_of_work
+from ..engines import pool_metrics
+from ..db_settings import db_settings
+from ..order_stats import OrderStats
+from ..sql_statements import (claim_order_statement, delete_in_id_range_statement,
+                              delete_clients_orders_in_id_range_statement, orders_by_status_statement,
+                              page_statement, count_orders_by_client_ids_statement, order_stats_statement,
+                              set_statuses_statement)
 
 
 class SQLModelDb(AbstractDb):
-    def __init__(self):
-        SQLModel.metadata.drop_all(bind=engine)
-        SQLModel.metadata.create_all(engine)
+    def __init__(self, database_engine: Engine = engine, reset_schema: bool = True):
+        self.engine = database_engine
+        if reset_schema:
+            SQLModel.metadata.drop_all(bind=self.engine)
+        SQLModel.metadata.create_all(self.engine)
         self.blocked = False
+        self.order_stats = OrderStats(db_settings.stats_reconcile_interval)
+
+    def unit_of_work(self):
+        return unit_of_work(self.engine)
+
+    def get_pool_metrics(self):
+        return pool_metrics(self.engine)
 
     def set_new_orders_db(self, new_orders_db: BlockingList):
-        with Session(engine) as session:
+        self.order_stats.mark_stale()
+        with Session(current_bind(self.engine)) as session:
             for order in self.get_orders_db():
                 session.delete(order)
             session.commit()
@@ -26,43 +43,64 @@ class SQLModelDb(AbstractDb):
             session.commit()
 
     def set_new_clients_db(self, new_clients_db: BlockingList):
-        with Session(engine) as session:
+        self.order_stats.mark_stale()
+        with Session(current_bind(self.engine)) as session:
             for client in self.get_clients_db():
                 session.delete(client)
             session.commit()
         for client in new_clients_db:
             self.add_client(client.name, client.password, client.photo, client.orders)
 
-    async def get_all_orders_as_dict(self):
-        statement = select(Order).order_by(Order.id) # noqa
-        with Session(engine) as session:
-            results = session.exec(statement).all()
+    async def get_all_orders_as_dict(self, limit: int | None = None, after_id: int | None = None):
+        with Session(current_bind(self.engine)) as session:
+            results = session.exec(page_statement(Order, limit, after_id)).scalars().all()
         return [order.model_dump() for order in results]
 
+    def stream_all_orders_as_dict(self, after_id: int | None = None):
+        statement = page_statement(Order, after_id=after_id).execution_options(yield_per=STREAM_BATCH_SIZE)
+        with Session(current_bind(self.engine)) as session:
+            for order in session.exec(statement).scalars():
+                yield order.model_dump()
+
     async def get_first_order_with_status(self, status_str: str):
         statement = select(Order).where(Order.status == status_str) # noqa
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             result = session.exec(statement).first()
             return result
 
+    def get_orders_by_status(self, status: OrderStatus, limit: int | None = None, after_id: int | None = None):
+        with Session(current_bind(self.engine)) as session:
+            return session.exec(orders_by_status_statement(Order, status, limit, after_id)).scalars().all()
+
     def get_order_by_id(self, order_id: int):
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             order = session.get(Order, order_id)
             return order
 
+    def claim_order_for_processing(self, order_id: int | None = None):
+        with Session(current_bind(self.engine), expire_on_commit=False) as session:
+            order = session.execute(claim_order_statement(Order, order_id)).scalars().first()
+            session.commit()
+            if order is not None:
+                self.order_stats.status_changed(OrderStatus.received, OrderStatus.in_progress)
+            return order
+
     def add_order(self, order: Order):
         if not self.blocked:
-            with Session(engine) as session:
+            with Session(current_bind(self.engine)) as session:
                 session.add(order)
+                session.flush()
+                self.order_stats.order_added(order.status, order.time)
                 session.commit()
 
     def add_client(self, name, password, photo=str(), orders=None):
         if not self.blocked:
             client = Client(name=name, photo=photo, password=password)
-            with Session(engine) as session:
+            with Session(current_bind(self.engine)) as session:
                 session.add(client)
                 session.commit()
                 session.refresh(client)
+                self.order_stats.client_added()
                 return client.id
 
     def add_order_to_client(self, order, client):
@@ -70,47 +108,77 @@ class SQLModelDb(AbstractDb):
 
     def get_client_by_name(self, full_name: str):
         statement = select(Client).where(Client.name == full_name) # noqa
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             result = session.exec(statement).first()
             return result
 
     def get_clients_by_ids(self, client_ids: list[int]):
         statement = select(Client).where(col(Client.id).in_(client_ids)) # noqa
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             result = session.exec(statement)
             orders = result.all()
             return orders
 
+    def count_orders_by_client_ids(self, client_ids: list[int]):
+        statement = count_orders_by_client_ids_statement(Order, Client, client_ids)
+        with Session(current_bind(self.engine)) as session:
+            return dict(session.exec(statement).all())
+
+    def get_order_stats(self):
+        if self.order_stats.needs_reconcile():
+            with Session(current_bind(self.engine)) as session:
+                self.order_stats.load(session.exec(order_stats_statement(Order)).all(),
+                                      session.exec(select(func.count()).select_from(Client)).one())
+        return self.order_stats.as_dict()
+
     def get_client_by_id(self, client_id: int):
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             client = session.get(Client, client_id)
             return client
 
-    def get_clients_db(self, count: int = None):
-        statement = select(Client).limit(count)
-        with Session(engine) as session:
-            results = session.exec(statement).all()
-            for client in results:
-                client.orders = deepcopy(client.orders)
-            return results
+    def get_clients_db(self, count: int = None, after_id: int | None = None):
+        statement = page_statement(Client, count, after_id).options(selectinload(Client.orders))
+        with Session(current_bind(self.engine)) as session:
+            return session.exec(statement).scalars().all()
 
     def get_orders_db(self):
         statement = select(Order).order_by(Order.id) # noqa
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             results = session.exec(statement).all()
             return results
 
     def remove_order(self, order: Order):
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             order = session.get(Order, order.id)
+            self.order_stats.order_removed(order.status, order.time)
             session.delete(order)
             session.commit()
 
     def remove_client(self, client: ClientInDb):
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             client = session.get(Client, client.id)
+            removed_order_ids = [order.id for order in client.orders]
             session.delete(client)
             session.commit()
+            self.order_stats.mark_stale()
+            return removed_order_ids
+
+    def remove_orders_in_id_range(self, first: int, last: int):
+        with Session(current_bind(self.engine)) as session:
+            removed_ids = list(session.execute(delete_in_id_range_statement(Order, first, last)
+                                               .returning(Order.id)).scalars())
+            session.commit()
+            self.order_stats.mark_stale()
+            return removed_ids
+
+    def remove_clients_in_id_range(self, first: int, last: int):
+        with Session(current_bind(self.engine)) as session:
+            removed_order_ids = list(session.execute(delete_clients_orders_in_id_range_statement(
+                Order, Client, first, last).returning(Order.id)).scalars())
+            removed_count = session.execute(delete_in_id_range_statement(Client, first, last)).rowcount
+            session.commit()
+            self.order_stats.mark_stale()
+            return removed_count, removed_order_ids
 
     def get_next_order_id(self):
         return self._get_next_id(Order)
@@ -118,10 +186,9 @@ class SQLModelDb(AbstractDb):
     def get_next_client_id(self):
         return self._get_next_id(Client)
 
-    @staticmethod
-    def _get_next_id(table):
+    def _get_next_id(self, table):
         statement = select(table.id).order_by(table.id)
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             next_id = session.exec(statement).first()
             if not next_id:
                 return 1
@@ -130,31 +197,31 @@ class SQLModelDb(AbstractDb):
 
     def get_clients_count(self):
         statement = select(func.count()).select_from(Client)
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             result = session.exec(statement).one()
             return result
 
     def get_orders_count(self):
         statement = select(func.count()).select_from(Order)
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             result = session.exec(statement).one()
             return result
 
     def get_password_from_client_by_name(self, full_name: str):
         statement = select(Client.password).where(Client.name == full_name) # noqa
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             result = session.exec(statement).first()
             return result
 
     def get_orders_by_client_id(self, client_id: int):
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             client_exists = session.get(Client, client_id)
 
         if not client_exists:
             return None
 
         statement2 = select(Order).where(Order.client_id == client_id) # noqa
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             orders = session.exec(statement2).all()
 
         return orders
@@ -179,7 +246,7 @@ class SQLModelDb(AbstractDb):
         pass
 
     def change_order_owner(self, client_id, order_id) -> None:
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             order = session.get(Order, order_id)
             order.client_id = client_id
             session.add(order)
@@ -188,13 +255,14 @@ class SQLModelDb(AbstractDb):
 
     def get_client_id_from_client_by_name(self, client_name) -> int:
         statement = select(Client.id).where(Client.name == client_name) # noqa
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             result = session.exec(statement).one()
             return result
 
     def replace_order_in_client_object(self, order) -> None:
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             order_db = session.get(Order, order.id)
+            self.order_stats.order_replaced(order_db.status, order_db.time, order.status, order.time)
             order_db.description = order.description
             order_db.time = order.time
             order_db.status = order.status
@@ -204,23 +272,32 @@ class SQLModelDb(AbstractDb):
             session.commit()
             session.refresh(order_db)
 
+    def set_orders_statuses(self, statuses: dict[int, OrderStatus]):
+        with Session(current_bind(self.engine)) as session:
+            old_statuses = session.exec(select(Order.id, Order.status).where(col(Order.id).in_(statuses))).all()
+            session.execute(set_statuses_statement(Order, statuses))
+            session.commit()
+        for order_id, old_status in old_statuses:
+            self.order_stats.status_changed(old_status, statuses[order_id])
+        return len(old_statuses)
+
     def map_client(self, client):
         statement1 = select(Client).where(Client.name == client.name) # noqa
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             client = session.exec(statement1).one()
             return Client.model_validate(client).model_dump()
 
-    def change_client_password(self, client, password):
-        with Session(engine) as session:
+    def change_client_password(self, client, hashed_password):
+        with Session(current_bind(self.engine)) as session:
             client = session.get(Client, client.id)
-            client.password = hash_password(password)
+            client.password = hashed_password
             session.add(client)
             session.commit()
             session.refresh(client)
 
     def update_one_client(self, client_name: str, updated_client):
         statement = select(Client).where(Client.name == client_name) # noqa
-        with Session(engine) as session:
+        with Session(current_bind(self.engine)) as session:
             client = session.exec(statement).one()
             client.name = updated_client.name
             client.password = updated_client.password
@@ -229,5 +306,5 @@ class SQLModelDb(AbstractDb):
             session.commit()
             session.refresh(client)
 
-    def remove_all_clients_orders(self, client) -> None:
-        pass
+    def remove_all_clients_orders(self, client) -> list[int]:
+        return []
@@ -0,0 +1,58 @@
+from sqlalchemy import select, update, delete, func, case, cast
+
+from order_package import OrderStatus
+
+MIN_INTEGER_ID = -2 ** 31
+MAX_INTEGER_ID = 2 ** 31 - 1
+
+
+def claim_order_statement(table, order_id: int | None = None):
+    claimed_id = (select(table.id).where(table.status == OrderStatus.received)  # noqa
+                  .order_by(table.id).limit(1).with_for_update(skip_locked=True))
+    if order_id is not None:
+        claimed_id = claimed_id.where(table.id == order_id)  # noqa
+    return (update(table).where(table.id == claimed_id.scalar_subquery())  # noqa
+            .values(status=OrderStatus.in_progress).returning(table))
+
+
+def set_statuses_statement(table, statuses: dict):
+    new_status = case({order_id: OrderStatus(status).name for order_id, status in statuses.items()}, value=table.id)
+    return (update(table).where(table.id.in_(statuses)).values(status=cast(new_status, table.status.type))
+            .execution_options(synchronize_session=False))
+
+
+def id_between(column, first: int, last: int):
+    return column.between(max(first, MIN_INTEGER_ID), min(last, MAX_INTEGER_ID))
+
+
+def delete_in_id_range_statement(table, first: int, last: int):
+    return (delete(table).where(id_between(table.id, first, last))
+            .execution_options(synchronize_session=False))
+
+
+def delete_clients_orders_in_id_range_statement(orders_table, clients_table, first: int, last: int):
+    clients_ids = select(clients_table.id).where(id_between(clients_table.id, first, last))
+    return (delete(orders_table).where(orders_table.client_id.in_(clients_ids))
+            .execution_options(synchronize_session=False))
+
+
+def count_orders_by_client_ids_statement(orders_table, clients_table, client_ids: list[int]):
+    client_ids = [client_id for client_id in set(client_ids) if MIN_INTEGER_ID <= client_id <= MAX_INTEGER_ID]
+    return (select(clients_table.id, func.count(orders_table.id)).select_from(clients_table)
+            .outerjoin(orders_table, orders_table.client_id == clients_table.id)  # noqa
+            .where(clients_table.id.in_(client_ids)).group_by(clients_table.id).order_by(clients_table.id))
+
+
+def order_stats_statement(table):
+    return select(table.status, table.time, func.count(table.id)).group_by(table.status, table.time)
+
+
+def page_statement(table, limit: int | None = None, after_id: int | None = None, statement=None):
+    statement = select(table) if statement is None else statement
+    if after_id is not None:
+        statement = statement.where(table.id > after_id)  # noqa
+    return statement.order_by(table.id).limit(limit)
+
+
+def orders_by_status_statement(table, status: OrderStatus, limit: int | None = None, after_id: int | None = None):
+    return page_statement(table, limit, after_id, select(table).where(table.status == status))  # noqa
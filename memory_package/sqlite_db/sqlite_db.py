@@ -0,0 +1,8 @@
+from memory_package.db_settings import db_settings
+from memory_package.engines import create_sqlite_engine
+from memory_package.sql_model_db.sql_model_db import SQLModelDb
+
+
+class SQLiteDb(SQLModelDb):
+    def __init__(self, database_url: str | None = None):
+        super().__init__(create_sqlite_engine(database_url or db_settings.sqlite_url), reset_schema=False)
@@ -0,0 +1,111 @@
+import asyncio
+from itertools import islice
+
+import memory_package
+from memory_package.db_abstract import resolve
+from memory_package.db_settings import db_settings
+from memory_package.in_memory_vars import orders_lock, logger
+from order_package import OrderStatus
+
+
+class StatusWriteBuffer:
+    def __init__(self, flush_interval: float = db_settings.status_flush_interval,
+                 flush_size: int = db_settings.status_flush_size):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._pending: dict[int, OrderStatus] = {}
+        self._flush_lock = asyncio.Lock()
+        self._driver: asyncio.Task | None = None
+        self._full: asyncio.Event | None = None
+        self.buffered_count = 0
+        self.coalesced_count = 0
+        self.written_count = 0
+        self.flush_count = 0
+
+    def set_status(self, order_id: int, status: OrderStatus) -> None:
+        if order_id in self._pending:
+            self.coalesced_count += 1
+        self._pending[order_id] = OrderStatus(status)
+        self.buffered_count += 1
+        loop = asyncio.get_running_loop()
+        if self._driver is None or self._driver.done() or self._driver.get_loop() is not loop:
+            self._full = asyncio.Event()
+            self._driver = loop.create_task(self._drive(), name="status-write-buffer")
+        elif len(self._pending) >= self.flush_size:
+            self._full.set()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def status_of(self, order_id: int) -> OrderStatus | None:
+        return self._pending.get(order_id)
+
+    def ids_with_status(self, status: OrderStatus) -> list[int]:
+        return sorted(order_id for order_id, pending_status in self._pending.items() if pending_status == status)
+
+    def overlay(self, order):
+        if not self._pending:
+            return order
+        if isinstance(order, dict):
+            order['status'] = self._pending.get(order['id'], order['status'])
+        elif order.id in self._pending:
+            order.status = self._pending[order.id]
+        return order
+
+    def overlay_client(self, client):
+        if self._pending:
+            for order in (client.get('orders') if isinstance(client, dict) else client.orders) or ():
+                self.overlay(order)
+        return client
+
+    async def flush(self) -> int:
+        if not self._pending and not self._flush_lock.locked():
+            return 0
+        written = 0
+        async with self._flush_lock:
+            while self._pending:
+                statuses = dict(islice(self._pending.items(), self.flush_size))
+                async with orders_lock:
+                    await resolve(memory_package.db.set_orders_statuses(statuses))
+                for order_id, status in statuses.items():
+                    if self._pending.get(order_id) == status:
+                        del self._pending[order_id]
+                written += len(statuses)
+                self.flush_count += 1
+        self.written_count += written
+        return written
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._driver is not None and self._driver.get_loop() is asyncio.get_running_loop():
+            self._driver.cancel()
+            await asyncio.gather(self._driver, return_exceptions=True)
+        self._driver = None
+
+    def discard(self, order_ids=None) -> None:
+        if order_ids is None:
+            self._pending.clear()
+            return
+        for order_id in order_ids:
+            self._pending.pop(order_id, None)
+
+    def get_metrics(self) -> dict:
+        return {"pending": len(self._pending), "buffered": self.buffered_count, "coalesced": self.coalesced_count,
+                "written": self.written_count, "flushes": self.flush_count}
+
+    async def _drive(self) -> None:
+        while self._pending:
+            if len(self._pending) < self.flush_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_interval)
+                except TimeoutError:
+                    pass
+            self._full.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Writing buffered order statuses failed")
+                await asyncio.sleep(self.flush_interval)
+
+
+status_writes = StatusWriteBuffer()
@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime
+import pytest
+from starlette import status
+from starlette.testclient import TestClient
+from app.main.main import app
+from memory_package import AsyncSQLiteDb
+from memory_package.sql_model_db.models import Order
+from order_package import OrderStatus
+import memory_package
+
+test_client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def async_sqlite_db(tmp_path):
+    previous_db, previous_db_type = memory_package.db, memory_package.db_type
+    memory_package.db = AsyncSQLiteDb('sqlite+aiosqlite:///' + str(tmp_path / 'test.db'))
+    memory_package.db_type = 'async_sqlite'
+    yield memory_package.db
+    memory_package.db, memory_package.db_type = previous_db, previous_db_type
+
+
+@pytest.mark.asyncio
+async def test_async_sql_db_should_save_and_return_clients_and_orders(async_sqlite_db):
+    client_id = await async_sqlite_db.add_client(name='Client', password='abc')
+    await async_sqlite_db.add_order(Order(description='order1', client_id=client_id, creation_date=datetime.now()))
+    assert (await async_sqlite_db.get_client_by_name('Client')).id == client_id
+    assert await async_sqlite_db.get_orders_count() == 1
+    orders = await async_sqlite_db.get_orders_by_client_id(client_id)
+    assert len(orders) == 1
+    assert orders[0].status == OrderStatus.received
+    assert await async_sqlite_db.get_orders_by_client_id(client_id + 1) is None
+
+
+@pytest.mark.asyncio
+async def test_async_sql_db_should_keep_persisted_data_when_reopened(async_sqlite_db):
+    client_id = await async_sqlite_db.add_client(name='Client', password='abc')
+    await async_sqlite_db.add_order(Order(description='order1', client_id=client_id, creation_date=datetime.now()))
+    await async_sqlite_db.engine.dispose()
+    reopened_db = AsyncSQLiteDb(str(async_sqlite_db.engine.url))
+    assert (await reopened_db.get_client_by_name('Client')).id == client_id
+    assert await reopened_db.get_orders_count() == 1
+    await reopened_db.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_async_sql_db_should_remove_client_with_orders(async_sqlite_db):
+    client_id = await async_sqlite_db.add_client(name='Client', password='abc')
+    await async_sqlite_db.add_order(Order(description='order1', client_id=client_id, creation_date=datetime.now()))
+    await async_sqlite_db.remove_client(await async_sqlite_db.get_client_by_id(client_id))
+    assert await async_sqlite_db.get_clients_count() == 0
+    assert await async_sqlite_db.get_orders_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_async_sql_db_should_count_orders_of_existing_clients_in_one_query(async_sqlite_db):
+    client_id1 = await async_sqlite_db.add_client(name='Client1', password='abc')
+    client_id2 = await async_sqlite_db.add_client(name='Client2', password='abc')
+    for description in ['order1', 'order2']:
+        await async_sqlite_db.add_order(Order(description=description, client_id=client_id1,
+                                              creation_date=datetime.now()))
+    counts = await async_sqlite_db.count_orders_by_client_ids([client_id2, client_id1, client_id1, 1555, 2 ** 40])
+    assert counts == {client_id1: 2, client_id2: 0}
+
+
+@pytest.mark.asyncio
+async def test_async_sql_db_should_keep_order_stats_equal_to_reconciled_ones(async_sqlite_db):
+    client_id = await async_sqlite_db.add_client(name='Client', password='abc')
+    for description, order_time in [('order1', 5), ('order2', 15), ('order3', 25)]:
+        await async_sqlite_db.add_order(Order(description=description, time=order_time, client_id=client_id,
+                                              creation_date=datetime.now()))
+    await async_sqlite_db.remove_order(await async_sqlite_db.claim_order_for_processing())
+    await async_sqlite_db.claim_order_for_processing()
+    stats = await async_sqlite_db.get_order_stats()
+    assert stats['orders_by_status'] == {'received': 1, 'in_progress': 1, 'complete': 0}
+    assert (stats['orders'], stats['clients'], stats['time']['average']) == (2, 1, 20)
+    async_sqlite_db.order_stats.mark_stale()
+    assert await async_sqlite_db.get_order_stats() == stats
+
+
+def test_create_order_should_save_order_when_db_is_async():
+    response = test_client.post("/orders/1", json={"description": "order1", "time": 2})
+    assert response.status_code == status.HTTP_201_CREATED
+    response = test_client.get("/orders/get/1")
+    assert response.status_code == status.HTTP_200_OK
+    orders = response.json()['orders']
+    assert len(orders) == 1
+    assert orders[0]['description'] == "order1"
+    assert test_client.get("/").json()["tasks_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_async_sql_db_should_claim_received_order_only_once(async_sqlite_db):
+    await async_sqlite_db.add_order(Order(description='order1', client_id=None, creation_date=datetime.now()))
+    claimed_order = await async_sqlite_db.claim_order_for_processing()
+    assert claimed_order.status == OrderStatus.in_progress
+    assert (await async_sqlite_db.get_order_by_id(claimed_order.id)).status == OrderStatus.in_progress
+    assert await async_sqlite_db.claim_order_for_processing() is None
+
+
+@pytest.mark.asyncio
+async def test_async_sql_db_should_stream_orders_after_id(async_sqlite_db):
+    client_id = await async_sqlite_db.add_client(name='Client', password='abc')
+    for description in ['order1', 'order2', 'order3']:
+        await async_sqlite_db.add_order(Order(description=description, client_id=client_id,
+                                              creation_date=datetime.now()))
+    first_id = (await async_sqlite_db.get_all_orders_as_dict(limit=1))[0]['id']
+    streamed = [order async for order in async_sqlite_db.stream_all_orders_as_dict(after_id=first_id)]
+    assert [order['description'] for order in streamed] == ['order2', 'order3']
+
+
+@pytest.mark.asyncio
+async def test_async_sql_db_should_create_schema_once_for_concurrent_first_requests(async_sqlite_db):
+    client_ids = await asyncio.gather(*(async_sqlite_db.add_client(name=f'Client{index}', password='abc')
+                                        for index in range(5)))
+    assert len(set(client_ids)) == 5
+    assert await async_sqlite_db.get_clients_count() == 5
@@ -0,0 +1,83 @@
+import pytest
+from starlette import status
+from starlette.testclient import TestClient
+from app.main.main import app
+from client_package import Client
+from memory_package import CachedDb, InMemoryDb
+import memory_package
+
+test_client = TestClient(app)
+
+
+class CountingDb(InMemoryDb):
+    def __init__(self):
+        super().__init__()
+        self.lookups = 0
+
+    def get_client_by_name(self, full_name: str):
+        self.lookups += 1
+        return super().get_client_by_name(full_name)
+
+
+@pytest.fixture
+def cached_db():
+    previous_db = memory_package.db
+    memory_package.db = CachedDb(CountingDb(), max_size=4, ttl=60)
+    yield memory_package.db
+    memory_package.db = previous_db
+
+
+@pytest.mark.asyncio
+async def test_cached_db_should_serve_repeated_lookups_from_cache(cached_db):
+    client_id = await cached_db.add_client(name='Client', password='abc')
+    assert (await cached_db.get_client_by_name('Client')).id == client_id
+    assert (await cached_db.get_client_by_name('Client')).id == client_id
+    assert (await cached_db.get_client_by_id(client_id)).name == 'Client'
+    assert cached_db.db.lookups == 1
+    assert cached_db.get_metrics()['hits'] == 2
+    assert cached_db.get_metrics()['misses'] == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_db_should_invalidate_client_on_writes(cached_db):
+    client_id = await cached_db.add_client(name='Client', password='abc')
+    client = await cached_db.get_client_by_name('Client')
+    await cached_db.change_client_password(client, 'new')
+    assert (await cached_db.get_client_by_name('Client')).password == 'new'
+    await cached_db.update_one_client('Client', Client(name='Renamed', password='new'))
+    assert await cached_db.get_client_by_name('Client') is None
+    assert (await cached_db.get_client_by_id(client_id)).name == 'Renamed'
+    await cached_db.remove_client(await cached_db.get_client_by_id(client_id))
+    assert await cached_db.get_client_by_id(client_id) is None
+
+
+@pytest.mark.asyncio
+async def test_cached_db_should_evict_least_recently_used_and_expired_clients(cached_db):
+    for name in ['Client1', 'Client2', 'Client3']:
+        await cached_db.add_client(name=name, password='abc')
+        await cached_db.get_client_by_name(name)
+    assert cached_db.get_metrics()['size'] == 4
+    assert cached_db.get_metrics()['evictions'] == 2
+    cached_db.ttl = 0
+    await cached_db.add_client(name='Client4', password='abc')
+    await cached_db.get_client_by_name('Client4')
+    await cached_db.get_client_by_name('Client4')
+    assert cached_db.db.lookups == 5
+
+
+def test_client_cache_stats_should_return_counters(cached_db):
+    response = test_client.get("/clients/cache/stats")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['stats']['max_size'] == 4
+
+
+@pytest.mark.asyncio
+async def test_cached_db_should_not_cache_clients_read_inside_unit_of_work(cached_db):
+    await cached_db.add_client(name='Client', password='abc')
+    with pytest.raises(RuntimeError):
+        async with cached_db.unit_of_work():
+            assert (await cached_db.get_client_by_name('Client')).name == 'Client'
+            raise RuntimeError()
+    assert cached_db.get_metrics()['size'] == 0
+    await cached_db.get_client_by_name('Client')
+    assert cached_db.get_metrics()['size'] == 2
@@ -0,0 +1,124 @@
+import asyncio
+from datetime import datetime
+import pytest
+from memory_package import DurableInMemoryDb
+from order_package import Order, OrderStatus
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path)
+
+
+def add_order(db, client_id, description):
+    order = Order(id=db.get_next_order_id(), description=description, client_id=client_id,
+                  creation_date=datetime(2024, 1, 1, 10, 0))
+    db.add_order_to_client(order, db.get_client_by_id(client_id))
+    db.add_order(order)
+    return order
+
+
+def dump(db):
+    return ([order.model_dump() for order in db.get_orders_db()],
+            [client.model_dump() for client in db.get_clients_db()])
+
+
+def test_durable_in_memory_db_should_recover_state_from_operation_log(directory):
+    db = DurableInMemoryDb(directory, fsync_batch_size=1000, fsync_interval=60, snapshot_every=1000)
+    client_id = db.add_client('Client', 'abc')
+    other_client_id = db.add_client('Other', 'abc')
+    first_order = add_order(db, client_id, 'order1')
+    add_order(db, client_id, 'order2')
+    claimed_order = db.claim_order_for_processing()
+    claimed_order.status = OrderStatus.complete
+    db.replace_order_in_client_object(claimed_order)
+    db.change_client_password(db.get_client_by_id(client_id), 'new')
+    db.remove_order_from_client(db.get_client_by_id(client_id), first_order)
+    db.change_order_owner(other_client_id, first_order.id)
+    db.add_order_to_client(first_order, db.get_client_by_id(other_client_id))
+    expected = dump(db)
+    db.close()
+
+    recovered = DurableInMemoryDb(directory)
+    assert dump(recovered) == expected
+    assert recovered.get_order_by_id(first_order.id).status == OrderStatus.complete
+    assert recovered.get_orders_by_status(OrderStatus.received)[0].description == 'order2'
+    assert recovered.get_client_by_name('Client').password == 'new'
+
+
+def test_durable_in_memory_db_should_snapshot_and_replay_only_log_tail(directory):
+    db = DurableInMemoryDb(directory, snapshot_every=3)
+    client_id = db.add_client('Client', 'abc')
+    for description in ['order1', 'order2', 'order3']:
+        add_order(db, client_id, description)
+    db.remove_client(db.get_client_by_name('Client'))
+    db.add_client('Client2', 'abc')
+    db.add_client('Client3', 'abc')
+    expected = dump(db)
+    assert db.get_persistence_metrics()['snapshots'] == 2
+    assert db.get_persistence_metrics()['records_since_snapshot'] == 1
+    db.close()
+
+    recovered = DurableInMemoryDb(directory)
+    assert dump(recovered) == expected
+    assert recovered.get_persistence_metrics()['records_since_snapshot'] == 1
+
+
+def test_durable_in_memory_db_should_ignore_torn_log_tail(directory):
+    db = DurableInMemoryDb(directory)
+    db.add_client('Client', 'abc')
+    db.close()
+    with open(db.log_path, 'ab') as log:
+        log.write(b'\x07\x00\x00')
+    recovered = DurableInMemoryDb(directory)
+    assert recovered.get_client_by_name('Client') is not None
+    recovered.add_client('Client2', 'abc')
+    recovered.close()
+    assert DurableInMemoryDb(directory).get_clients_count() == 2
+
+
+def test_durable_in_memory_db_should_fsync_log_in_batches(directory):
+    db = DurableInMemoryDb(directory, fsync_batch_size=4, fsync_interval=60)
+    for index in range(6):
+        db.add_client(f'Client{index}', 'abc')
+    metrics = db.get_persistence_metrics()
+    assert metrics['fsyncs'] == 1
+    assert metrics['pending_fsync'] == 2
+    db.close()
+    assert db.get_persistence_metrics()['pending_fsync'] == 0
+
+
+@pytest.mark.asyncio
+async def test_durable_in_memory_db_should_fsync_log_tail_after_interval_when_idle(directory):
+    db = DurableInMemoryDb(directory, fsync_batch_size=1000, fsync_interval=0.05)
+    db.add_client('Client', 'abc')
+    db.add_client('Client2', 'abc')
+    assert db.get_persistence_metrics()['pending_fsync'] == 2
+    await asyncio.sleep(0.5)
+    assert db.get_persistence_metrics()['pending_fsync'] == 0
+    assert db.get_persistence_metrics()['fsyncs'] == 1
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_durable_in_memory_db_should_write_snapshot_in_background_and_keep_later_records(directory):
+    db = DurableInMemoryDb(directory, snapshot_every=3)
+    client_id = db.add_client('Client', 'abc')
+    add_order(db, client_id, 'order1')
+    add_order(db, client_id, 'order2')
+    assert db.get_persistence_metrics()['snapshot_in_progress']
+    add_order(db, client_id, 'order3')
+    db.set_orders_statuses({2: OrderStatus.complete})
+    while db.get_persistence_metrics()['snapshot_in_progress']:
+        await asyncio.sleep(0.01)
+    assert db.get_persistence_metrics()['snapshots'] == 1
+    expected = dump(db)
+    expected_stats = db.get_order_stats()
+    db.close()
+
+    recovered = DurableInMemoryDb(directory)
+    assert dump(recovered) == expected
+    assert recovered.get_persistence_metrics()['records_since_snapshot'] == 2
+    assert recovered.get_orders_by_status(OrderStatus.complete)[0].description == 'order2'
+    assert recovered.orders_db.ids_of_client(client_id).tolist() == [1, 2, 3]
+    assert recovered.get_order_stats() == expected_stats
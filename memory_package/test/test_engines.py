@@ -0,0 +1,37 @@
+from sqlalchemy import text
+from memory_package.db_settings import DatabaseSettings
+from memory_package.engines import create_configured_engine, pool_metrics
+
+
+def test_database_settings_should_read_pool_options_from_environment(monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '20')
+    monkeypatch.setenv('DB_POOL_CLASS', 'null')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'true')
+    settings = DatabaseSettings()
+    assert settings.pool_size == 20
+    assert settings.pool_class == 'null'
+    assert settings.pool_pre_ping is True
+    assert settings.echo is False
+
+
+def test_configured_engine_should_report_occupancy_and_checkout_wait(tmp_path):
+    settings = DatabaseSettings(pool_size=2, max_overflow=0)
+    engine = create_configured_engine('sqlite:///' + str(tmp_path / 'test.db'), settings)
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+        metrics = pool_metrics(engine)
+        assert metrics['pool_class'] == 'TimedQueuePool'
+        assert metrics['size'] == 2
+        assert metrics['checked_out'] == 1
+    metrics = pool_metrics(engine)
+    assert metrics['checked_out'] == 0
+    assert metrics['checkouts'] == 1
+    assert metrics['max_wait_seconds'] >= 0
+
+
+def test_configured_engine_should_use_null_pool_when_configured(tmp_path):
+    engine = create_configured_engine('sqlite:///' + str(tmp_path / 'test.db'), DatabaseSettings(pool_class='null'))
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+    assert pool_metrics(engine)['pool_class'] == 'TimedNullPool'
+    assert pool_metrics(engine)['checkouts'] == 1
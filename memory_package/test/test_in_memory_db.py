@@ -0,0 +1,43 @@
+import asyncio
+from datetime import datetime
+import pytest
+from client_package import Client
+from memory_package import InMemoryDb, orders_lock
+from memory_package.blocking_list import BlockingList
+from order_package import Order
+
+
+def test_update_one_client_should_replace_only_updated_client_and_reindex_its_name():
+    db = InMemoryDb()
+    for name in ['Client1', 'Client2', 'Client3']:
+        db.add_client(name, 'abc')
+    untouched_clients = [db.get_client_by_name('Client1'), db.get_client_by_name('Client3')]
+    db.update_one_client('Client2', Client(name='Renamed', password='new'))
+    assert db.get_client_by_name('Client2') is None
+    assert db.get_client_by_name('Renamed').id == 2
+    assert db.get_client_by_id(2).password == 'new'
+    assert [db.get_client_by_id(1), db.get_client_by_id(3)] == untouched_clients
+    assert all(client is stored_client for client, stored_client in zip(untouched_clients, db.clients_db[::2]))
+
+
+def test_set_new_clients_db_should_take_over_given_list_without_copying():
+    db = InMemoryDb()
+    db.add_client('Client1', 'abc')
+    new_clients_db = BlockingList(db.clients_db)
+    db.set_new_clients_db(new_clients_db)
+    assert db.clients_db is new_clients_db
+    assert db.get_client_by_name('Client1') is new_clients_db[0]
+
+
+@pytest.mark.asyncio
+async def test_stream_all_orders_as_dict_should_wait_for_writers_before_reading_a_batch():
+    db = InMemoryDb()
+    for order_id in [1, 2, 3]:
+        db.add_order(Order(id=order_id, description=f'order{order_id}', client_id=None,
+                           creation_date=datetime(2024, 1, 1)))
+    async with orders_lock:
+        stream = asyncio.ensure_future(anext(db.stream_all_orders_as_dict(after_id=1)))
+        await asyncio.sleep(0)
+        assert not stream.done()
+        db.remove_order(db.get_order_by_id(2))
+    assert (await stream)['id'] == 3
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+from memory_package.in_memory_db.order_store import OrderStore
+from order_package import Order, OrderStatus
+
+
+def make_order(order_id: int, client_id: int | None = 1, status: OrderStatus = OrderStatus.received,
+               description: str = 'Order', creation_date: datetime = datetime(2024, 8, 8, 16, 11, 0, 402291)) -> Order:
+    return Order(id=order_id, description=description, client_id=client_id, status=status,
+                 creation_date=creation_date)
+
+
+def test_order_store_should_materialize_orders_equal_to_stored_ones():
+    aware_date = datetime(2024, 8, 8, 16, 11, tzinfo=timezone(timedelta(hours=2)))
+    orders = [make_order(2, client_id=None), make_order(1, creation_date=aware_date, status=OrderStatus.complete)]
+    store = OrderStore(orders)
+    assert [order.model_dump() for order in store] == [orders[1].model_dump(), orders[0].model_dump()]
+    assert store.get(1).creation_date.utcoffset() == timedelta(hours=2)
+    assert store.get(3) is None
+    assert 2 in store and len(store) == 2
+
+
+def test_order_store_should_page_orders_with_status_from_row_after_id():
+    store = OrderStore(make_order(order_id, status=OrderStatus.complete if order_id % 2 else OrderStatus.received)
+                       for order_id in range(1, 11))
+    rows = store.rows_with_status(OrderStatus.received, store.first_row_after(4), limit=2)
+    assert [store.ids[row] for row in rows] == [6, 8]
+    assert store.set_status(6, OrderStatus.in_progress)
+    assert [store.ids[row] for row in store.rows_with_status(OrderStatus.in_progress)] == [6]
+
+
+def test_order_store_should_keep_client_index_in_sync_on_owner_change_and_removal():
+    store = OrderStore(make_order(order_id, client_id=order_id % 2 + 1) for order_id in range(1, 7))
+    assert list(store.ids_of_client(1)) == [2, 4, 6]
+    assert store.set_client_id(2, 2)
+    assert list(store.ids_of_client(1)) == [4, 6]
+    assert list(store.ids_of_client(2)) == [1, 2, 3, 5]
+    assert store.remove_ids([1, 2, 3, 6]) == [(1, 2), (2, 2), (3, 2), (6, 1)]
+    assert list(store.ids) == [4, 5]
+    assert list(store.ids_of_client(2)) == [5]
+    assert store.remove_rows(store.rows_in_id_range(0, 4)) == [(4, 1)]
+    assert list(store.ids_of_client(1)) == []
+
+
+def test_order_store_should_intern_repeated_descriptions():
+    store = OrderStore(make_order(order_id, description='Same') for order_id in range(1, 101))
+    assert len(store._descriptions) == 1
+    assert {order.description for order in store} == {'Same'}
+
+
+def test_order_store_should_keep_stats_in_sync_with_writes_and_removals():
+    store = OrderStore(Order(id=order_id, description=f'Order{order_id}', time=order_id * 10, client_id=None,
+                             creation_date=datetime(2024, 8, 8)) for order_id in range(1, 11))
+    store.set_status(1, OrderStatus.in_progress)
+    store.update(make_order(2, status=OrderStatus.complete))
+    store.remove_ids([3, 5, 7])
+    stats = store.stats.as_dict()
+    assert stats['orders_by_status'] == {'received': 5, 'in_progress': 1, 'complete': 1}
+    assert stats['time'] == {'average': 440 / 7, 'p50': 60, 'p90': 100, 'p99': 100}
+    store.clear()
+    assert store.stats.as_dict()['time']['average'] is None
+
+
+def test_order_store_should_keep_status_index_in_sync_with_writes_removals_and_columns():
+    store = OrderStore(make_order(order_id) for order_id in range(1, 11))
+    store.set_status(3, OrderStatus.complete)
+    store.update(make_order(4, status=OrderStatus.in_progress))
+    store.put(make_order(11, status=OrderStatus.complete))
+    store.remove_ids([2, 5, 9])
+    store.remove_rows(store.rows_in_id_range(6, 7))
+    for rebuilt in (store, OrderStore.from_columns(store.columns())):
+        for status in OrderStatus:
+            rows = rebuilt.rows_with_status(status)
+            assert rows == [row for row in range(len(rebuilt)) if rebuilt.status_of(rebuilt.ids[row]) == status]
+    assert [store.ids[row] for row in store.rows_with_status(OrderStatus.received)] == [1, 8, 10]
+    assert [store.ids[row] for row in store.rows_with_status(OrderStatus.complete, store.first_row_after(3))] == [11]
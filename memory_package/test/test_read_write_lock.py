@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from memory_package.read_write_lock import ReadWriteLock
+
+
+@pytest.mark.asyncio
+async def test_read_write_lock_should_let_readers_run_concurrently():
+    lock = ReadWriteLock()
+    inside = []
+
+    async def read():
+        async with lock.reading():
+            inside.append(lock.readers)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(read() for _ in range(5)))
+    assert max(inside) == 5
+    assert lock.readers == 0
+
+
+@pytest.mark.asyncio
+async def test_read_write_lock_should_make_new_readers_wait_behind_waiting_writer():
+    lock = ReadWriteLock()
+    events = []
+
+    async def read(name, delay):
+        async with lock.reading():
+            events.append(name)
+            await asyncio.sleep(delay)
+
+    async def write():
+        async with lock:
+            events.append('writer')
+            assert lock.readers == 0
+
+    first_reader = asyncio.create_task(read('reader1', 0.02))
+    await asyncio.sleep(0)
+    writer = asyncio.create_task(write())
+    await asyncio.sleep(0)
+    second_reader = asyncio.create_task(read('reader2', 0))
+    await asyncio.gather(first_reader, writer, second_reader)
+    assert events == ['reader1', 'writer', 'reader2']
+    assert not lock.locked()
+
+
+@pytest.mark.asyncio
+async def test_read_write_lock_should_skip_cancelled_waiters():
+    lock = ReadWriteLock()
+    async with lock.reading():
+        writer = asyncio.create_task(lock.writing().__aenter__())
+        await asyncio.sleep(0)
+        writer.cancel()
+        await asyncio.gather(writer, return_exceptions=True)
+        async with lock.reading():
+            assert lock.readers == 2
+    async with lock.writing():
+        assert lock.locked()
@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from sqlalchemy import inspect, text
+from memory_package import SQLiteDb
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    return SQLiteDb('sqlite:///' + str(tmp_path / 'test.db'))
+
+
+def test_sqlite_db_should_open_connections_in_wal_mode_with_tuned_pragmas(sqlite_db):
+    with sqlite_db.engine.connect() as connection:
+        assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert connection.execute(text('PRAGMA synchronous')).scalar() == 1
+        assert connection.execute(text('PRAGMA foreign_keys')).scalar() == 1
+        assert connection.execute(text('PRAGMA cache_size')).scalar() == -64 * 1024
+
+
+def test_sqlite_db_should_index_client_id_status_and_name(sqlite_db):
+    inspector = inspect(sqlite_db.engine)
+    orders_indexes = [index['column_names'] for index in inspector.get_indexes('orders')]
+    clients_indexes = [index['column_names'] for index in inspector.get_indexes('client')]
+    assert ['client_id'] in orders_indexes
+    assert ['status', 'id'] in orders_indexes
+    assert ['name'] in clients_indexes
+
+
+def test_sqlite_db_should_not_share_connection_between_overlapping_transactions(sqlite_db):
+    with sqlite_db.engine.begin() as first, sqlite_db.engine.connect() as second:
+        assert first.connection.dbapi_connection is not second.connection.dbapi_connection
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(lambda: sqlite_db.get_clients_count()).result()
+    assert sqlite_db.get_pool_metrics()['pool_class'] == 'TimedQueuePool'
+
+
+def test_sqlite_db_should_keep_rows_when_reopened_on_same_file(tmp_path):
+    database_url = 'sqlite:///' + str(tmp_path / 'test.db')
+    client_id = SQLiteDb(database_url).add_client(name='Client', password='abc')
+    reopened_db = SQLiteDb(database_url)
+    assert reopened_db.get_client_by_id(client_id).name == 'Client'
+    assert reopened_db.get_clients_count() == 1
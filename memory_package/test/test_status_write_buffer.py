@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from starlette.testclient import TestClient
+from app.main.main import app
+import memory_package
+from memory_package import StatusWriteBuffer
+from order_package import OrderStatus
+from routers.test.commons import local_add_client, local_add_order_to_db_and_client, client1
+
+
+@pytest.fixture(autouse=True)
+def reset_db_status():
+    memory_package.reset_db()
+
+
+def add_orders(count: int) -> list[int]:
+    client_id = local_add_client(client1)
+    for number in range(count):
+        local_add_order_to_db_and_client(client_id, "order" + str(number))
+    return [order.id for order in memory_package.db.get_orders_db()]
+
+
+async def wait_until(condition, timeout: float = 5):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_status_write_buffer_should_coalesce_transitions_into_one_batched_write():
+    order_ids = add_orders(3)
+    buffer = StatusWriteBuffer(flush_interval=0.05, flush_size=100)
+    for order_id in order_ids:
+        buffer.set_status(order_id, OrderStatus.in_progress)
+        buffer.set_status(order_id, OrderStatus.complete)
+    assert buffer.status_of(order_ids[0]) == OrderStatus.complete
+    assert memory_package.db.get_order_by_id(order_ids[0]).status == OrderStatus.received
+    await wait_until(lambda: buffer.get_metrics()['pending'] == 0)
+    assert [memory_package.db.get_order_by_id(order_id).status for order_id in order_ids] == [OrderStatus.complete] * 3
+    assert buffer.get_metrics() == {"pending": 0, "buffered": 6, "coalesced": 3, "written": 3, "flushes": 1}
+    assert (await memory_package.resolve(memory_package.db.get_order_stats()))['orders_by_status']['complete'] == 3
+
+
+@pytest.mark.asyncio
+async def test_status_write_buffer_should_flush_when_full_and_on_close():
+    order_ids = add_orders(3)
+    buffer = StatusWriteBuffer(flush_interval=100, flush_size=2)
+    buffer.set_status(order_ids[0], OrderStatus.complete)
+    buffer.set_status(order_ids[1], OrderStatus.complete)
+    await wait_until(lambda: buffer.get_metrics()['written'] == 2)
+    assert buffer.get_metrics()['flushes'] == 1
+    buffer.set_status(order_ids[2], OrderStatus.in_progress)
+    await buffer.close()
+    assert memory_package.db.get_order_by_id(order_ids[2]).status == OrderStatus.in_progress
+    assert buffer.get_metrics()['pending'] == 0
+
+
+@pytest.mark.asyncio
+async def test_order_routes_should_read_buffered_statuses_before_they_are_written():
+    order_ids = add_orders(2)
+    client_id = memory_package.db.get_order_by_id(order_ids[0]).client_id
+    memory_package.status_writes.set_status(order_ids[0], OrderStatus.complete)
+    response = TestClient(app).get("/orders/get/" + str(client_id))
+    assert [order['status'] for order in response.json()['orders']] == [OrderStatus.complete, OrderStatus.received]
+    assert memory_package.db.get_order_by_id(order_ids[0]).status == OrderStatus.received
+    response = TestClient(app).get("/orders/get/status/complete")
+    assert [order['id'] for order in response.json()['orders']] == [order_ids[0]]
+    response = TestClient(app).get("/orders/get/status/received", params={"limit": 1})
+    assert [order['id'] for order in response.json()['orders']] == [order_ids[1]]
+    assert memory_package.status_writes.get_metrics()['pending'] == 1
+    assert memory_package.db.get_order_by_id(order_ids[0]).status == OrderStatus.received
+    memory_package.status_writes.discard()
+
+
+@pytest.mark.asyncio
+async def test_client_routes_should_read_buffered_statuses_before_they_are_written():
+    order_ids = add_orders(2)
+    memory_package.status_writes.set_status(order_ids[1], OrderStatus.in_progress)
+    expected = [OrderStatus.received, OrderStatus.in_progress]
+    response = TestClient(app).get("/clients/")
+    assert [order['status'] for order in response.json()[0]['orders']] == expected
+    client_data = memory_package.status_writes.overlay_client({"orders": [{"id": order_ids[1], "status": expected[0]}]})
+    assert client_data['orders'][0]['status'] == OrderStatus.in_progress
+    memory_package.status_writes.discard()
@@ -0,0 +1,37 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from sqlalchemy import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+_connection: ContextVar[Connection | AsyncConnection | None] = ContextVar('unit_of_work_connection', default=None)
+
+
+def current_bind(engine: Engine | AsyncEngine) -> Engine | AsyncEngine | Connection | AsyncConnection:
+    connection = _connection.get()
+    return connection if connection is not None and connection.engine is engine else engine
+
+
+@asynccontextmanager
+async def unit_of_work(engine: Engine):
+    if _connection.get() is not None:
+        yield
+        return
+    with engine.begin() as connection:
+        token = _connection.set(connection)
+        try:
+            yield
+        finally:
+            _connection.reset(token)
+
+
+@asynccontextmanager
+async def async_unit_of_work(engine: AsyncEngine):
+    if _connection.get() is not None:
+        yield
+        return
+    async with engine.begin() as connection:
+        token = _connection.set(connection)
+        try:
+            yield
+        finally:
+            _connection.reset(token)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, field_serializer
 from .order_status import OrderStatus
 
 
@@ -11,6 +11,10 @@ class Order(BaseModel):
     client_id: int | None
     creation_date: datetime
 
+    @field_serializer('creation_date', when_used='json')
+    def serialize_creation_date(self, creation_date: datetime) -> str:
+        return creation_date.isoformat()
+
     def __hash__(self):
         return hash(self.id)
 
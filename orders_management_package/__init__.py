@@ -1,2 +1,4 @@
-from .process_order import process_order
+from .process_order import process_order, complete_orders
+from .order_scheduler import OrderScheduler
 from .order_dto import OrderDTO
+from .order_processor import OrderProcessor, order_processor
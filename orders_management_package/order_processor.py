@@ -0,0 +1,135 @@
+import asyncio
+import os
+import time
+from collections import deque
+from app.main.exceptions import OrderQueueFullException
+from memory_package import logger, status_writes
+from order_package import Order
+from .order_scheduler import OrderScheduler, ORDER_COMPLETION_BATCH_WINDOW, cancel_on_own_loop
+from .process_order import process_order, complete_orders
+
+ORDER_PROCESSING_WORKERS = int(os.getenv('ORDER_PROCESSING_WORKERS', 8))
+ORDER_PROCESSING_QUEUE_SIZE = int(os.getenv('ORDER_PROCESSING_QUEUE_SIZE', 1000))
+THROUGHPUT_WINDOW_SECONDS = 60
+
+
+class OrderProcessor:
+    def __init__(self, workers: int = ORDER_PROCESSING_WORKERS, max_queue_size: int = ORDER_PROCESSING_QUEUE_SIZE,
+                 completion_batch_window: float = ORDER_COMPLETION_BATCH_WINDOW):
+        self.workers_count = workers
+        self.max_queue_size = max_queue_size
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._workers: list[asyncio.Task] = []
+        self._queued_ids: set[int] = set()
+        self._completed_at: deque[float] = deque()
+        self.scheduler = OrderScheduler(self._complete, completion_batch_window)
+        self.in_flight = 0
+        self.completed_count = 0
+        self.failed_count = 0
+        self.rejected_count = 0
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        for worker in self._workers:
+            cancel_on_own_loop(worker)
+        self.scheduler.abandon()
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._slots = asyncio.Semaphore(self.workers_count)
+        self._queued_ids = set()
+        self.in_flight = 0
+        self.scheduler = OrderScheduler(self._complete, self.scheduler.batch_window)
+        self._workers = [loop.create_task(self._work(), name=f"order-worker-{i}") for i in range(self.workers_count)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        await self.scheduler.stop()
+        self._workers = []
+        self._queue = None
+        self._loop = None
+
+    def submit(self, order: Order) -> bool:
+        self.start()
+        if order.id in self._queued_ids:
+            return False
+        try:
+            self._queue.put_nowait(order)
+        except asyncio.QueueFull:
+            self.rejected_count += 1
+            raise OrderQueueFullException(f"Order processing queue is full ({self.max_queue_size} orders)")
+        self._queued_ids.add(order.id)
+        return True
+
+    def cancel(self, order_id: int) -> bool:
+        if not self.scheduler.cancel(order_id):
+            return False
+        self._finish(order_id)
+        return True
+
+    def forget(self, order_ids) -> None:
+        for order_id in order_ids:
+            if not self.cancel(order_id):
+                self._queued_ids.discard(order_id)
+        status_writes.discard(order_ids)
+
+    def get_metrics(self) -> dict:
+        self._trim_completed()
+        return {"workers": self.workers_count, "max_queue_size": self.max_queue_size,
+                "queue_depth": self._queue.qsize() if self._queue else 0, "in_flight": self.in_flight,
+                "scheduled": len(self.scheduler), "completion_batches": self.scheduler.batch_count,
+                "completed": self.completed_count, "failed": self.failed_count, "rejected": self.rejected_count,
+                "completed_per_second": len(self._completed_at) / THROUGHPUT_WINDOW_SECONDS}
+
+    async def _work(self) -> None:
+        queue = self._queue
+        while True:
+            await self._slots.acquire()
+            try:
+                order = await queue.get()
+            except asyncio.CancelledError:
+                self._slots.release()
+                raise
+            if order.id not in self._queued_ids:
+                self._slots.release()
+                queue.task_done()
+                continue
+            self.in_flight += 1
+            try:
+                await process_order(order, self.scheduler)
+            except asyncio.CancelledError:
+                self._finish(order.id)
+                raise
+            except Exception:
+                self.failed_count += 1
+                self._finish(order.id)
+                logger.exception(f"Processing order with id = {order.id} failed")
+            finally:
+                queue.task_done()
+
+    def _complete(self, order_ids: list[int]) -> None:
+        complete_orders(order_ids)
+        completed_at = time.monotonic()
+        for order_id in order_ids:
+            self._finish(order_id)
+            self._completed_at.append(completed_at)
+        self.completed_count += len(order_ids)
+        self._trim_completed()
+
+    def _finish(self, order_id: int) -> None:
+        self.in_flight -= 1
+        self._queued_ids.discard(order_id)
+        self._slots.release()
+
+    def _trim_completed(self) -> None:
+        threshold = time.monotonic() - THROUGHPUT_WINDOW_SECONDS
+        while self._completed_at and self._completed_at[0] < threshold:
+            self._completed_at.popleft()
+
+
+order_processor = OrderProcessor()
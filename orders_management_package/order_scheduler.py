@@ -0,0 +1,122 @@
+import asyncio
+import heapq
+import os
+from collections.abc import Callable
+from math import inf
+
+from memory_package import logger
+
+ORDER_COMPLETION_BATCH_WINDOW = float(os.getenv('ORDER_COMPLETION_BATCH_WINDOW', 0.01))
+
+
+class OrderScheduler:
+    def __init__(self, on_due: Callable[[list[int]], None], batch_window: float = ORDER_COMPLETION_BATCH_WINDOW):
+        self.on_due = on_due
+        self.batch_window = batch_window
+        self._heap: list[tuple[float, int]] = []
+        self._deadlines: dict[int, float] = {}
+        self._driver: asyncio.Task | None = None
+        self._wakeup: asyncio.Future | None = None
+        self._sleep_until = inf
+        self.fired_count = 0
+        self.batch_count = 0
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def __contains__(self, order_id: int):
+        return order_id in self._deadlines
+
+    def schedule(self, order_id: int, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + delay
+        self._deadlines[order_id] = deadline
+        heapq.heappush(self._heap, (deadline, order_id))
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._compact()
+        if self._driver is None or self._driver.done() or self._driver.get_loop() is not loop:
+            self._driver = loop.create_task(self._drive(), name="order-scheduler")
+        elif deadline < self._sleep_until and self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    def reschedule(self, order_id: int, delay: float) -> bool:
+        if order_id not in self._deadlines:
+            return False
+        self.schedule(order_id, delay)
+        return True
+
+    def cancel(self, order_id: int) -> bool:
+        return self._deadlines.pop(order_id, None) is not None
+
+    def deadline_of(self, order_id: int) -> float | None:
+        return self._deadlines.get(order_id)
+
+    async def stop(self) -> None:
+        if self._driver is not None and self._driver.get_loop() is asyncio.get_running_loop():
+            self._driver.cancel()
+            await asyncio.gather(self._driver, return_exceptions=True)
+        self._driver = None
+        self._heap = []
+        self._deadlines = {}
+
+    def abandon(self) -> None:
+        if self._driver is not None:
+            cancel_on_own_loop(self._driver)
+        self._driver = None
+        self._heap = []
+        self._deadlines = {}
+
+    async def _drive(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._deadlines:
+            self._drop_stale()
+            deadline = self._heap[0][0]
+            if deadline > loop.time():
+                await self._sleep_until_deadline(loop, deadline)
+                continue
+            due = self._pop_due(loop.time() + self.batch_window)
+            self.batch_count += 1
+            self.fired_count += len(due)
+            try:
+                self.on_due(due)
+            except Exception:
+                logger.exception(f"Completing {len(due)} scheduled orders failed")
+
+    async def _sleep_until_deadline(self, loop: asyncio.AbstractEventLoop, deadline: float) -> None:
+        self._wakeup = loop.create_future()
+        self._sleep_until = deadline
+        handle = loop.call_at(deadline, _wake, self._wakeup)
+        try:
+            await self._wakeup
+        finally:
+            handle.cancel()
+            self._wakeup = None
+            self._sleep_until = inf
+
+    def _pop_due(self, until: float) -> list[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= until:
+            deadline, order_id = heapq.heappop(self._heap)
+            if self._deadlines.get(order_id) == deadline:
+                del self._deadlines[order_id]
+                due.append(order_id)
+        return due
+
+    def _drop_stale(self) -> None:
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def _compact(self) -> None:
+        self._heap = [(deadline, order_id) for order_id, deadline in self._deadlines.items()]
+        heapq.heapify(self._heap)
+
+
+def cancel_on_own_loop(task: asyncio.Task) -> None:
+    loop = task.get_loop()
+    if not task.done() and not loop.is_closed():
+        loop.call_soon_threadsafe(task.cancel)
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
@@ -1,21 +1,16 @@
-from asyncio import sleep, create_task
-
-import memory_package
-from memory_package import orders_lock, logger
+from memory_package import logger, status_writes
 from order_package import Order, OrderStatus
+from .order_scheduler import OrderScheduler
 
 
-async def process_order(order: Order):
-    task = create_task(process_simulator(order))
-    async with orders_lock:
+async def process_order(order: Order, scheduler: OrderScheduler):
+    if order.status != OrderStatus.in_progress:
         order.status = OrderStatus.in_progress
-        memory_package.db.replace_order_in_client_object(order)
-    await task
-    logger.info("Finished processing order")
-    async with orders_lock:
-        order.status = OrderStatus.complete
-        memory_package.db.replace_order_in_client_object(order)
+        status_writes.set_status(order.id, order.status)
+    scheduler.schedule(order.id, order.time)
 
 
-async def process_simulator(order: Order):
-    await sleep(order.time)
+def complete_orders(order_ids: list[int]):
+    for order_id in order_ids:
+        status_writes.set_status(order_id, OrderStatus.complete)
+    logger.info(f"Finished processing {len(order_ids)} orders")
@@ -0,0 +1,149 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import patch
+import pytest
+from app.main.exceptions import OrderQueueFullException
+from order_package import Order
+from orders_management_package import OrderProcessor
+
+
+def make_order(order_id: int) -> Order:
+    return Order(id=order_id, description='Order' + str(order_id), creation_date=datetime.now(), client_id=None)
+
+
+@pytest.mark.asyncio
+async def test_order_processor_should_process_submitted_orders_and_count_them():
+    processed = []
+    completed = []
+
+    async def fake_process_order(order, scheduler):
+        processed.append(order.id)
+        scheduler.schedule(order.id, 0)
+
+    with patch("orders_management_package.order_processor.process_order", fake_process_order), \
+            patch("orders_management_package.order_processor.complete_orders", completed.extend):
+        processor = OrderProcessor(workers=2, max_queue_size=10)
+        processor.start()
+        assert processor.submit(make_order(1))
+        assert processor.submit(make_order(2))
+        async with asyncio.timeout(5):
+            while processor.get_metrics()['completed'] < 2:
+                await asyncio.sleep(0.01)
+        metrics = processor.get_metrics()
+        await processor.stop()
+    assert sorted(processed) == sorted(completed) == [1, 2]
+    assert metrics['completed'] == 2
+    assert metrics['completion_batches'] == 1
+    assert metrics['queue_depth'] == 0
+    assert metrics['in_flight'] == 0
+    assert metrics['completed_per_second'] > 0
+
+
+@pytest.mark.asyncio
+async def test_order_processor_should_reject_orders_when_queue_is_full_and_ignore_duplicates():
+    release = asyncio.Event()
+
+    async def fake_process_order(_order, _scheduler):
+        await release.wait()
+
+    with patch("orders_management_package.order_processor.process_order", fake_process_order):
+        processor = OrderProcessor(workers=1, max_queue_size=1)
+        processor.start()
+        processor.submit(make_order(1))
+        await asyncio.sleep(0)
+        assert processor.submit(make_order(2))
+        assert not processor.submit(make_order(2))
+        with pytest.raises(OrderQueueFullException):
+            processor.submit(make_order(3))
+        metrics = processor.get_metrics()
+        assert metrics['in_flight'] == 1
+        assert metrics['queue_depth'] == 1
+        assert metrics['rejected'] == 1
+        release.set()
+        await processor.stop()
+
+
+@pytest.mark.asyncio
+async def test_order_processor_should_cancel_workers_on_stop():
+    started = asyncio.Event()
+
+    async def fake_process_order(_order, _scheduler):
+        started.set()
+        await asyncio.sleep(100)
+
+    with patch("orders_management_package.order_processor.process_order", fake_process_order):
+        processor = OrderProcessor(workers=1, max_queue_size=1)
+        processor.submit(make_order(1))
+        await started.wait()
+        workers = list(processor._workers)
+        await processor.stop()
+    assert all(worker.cancelled() for worker in workers)
+    assert processor.get_metrics()['completed'] == 0
+
+
+def test_order_processor_should_cancel_previous_loop_workers_when_started_on_new_loop():
+    async def fake_process_order(_order, _scheduler):
+        await asyncio.sleep(100)
+
+    async def start_and_submit(processor):
+        processor.start()
+        processor.submit(make_order(1))
+        processor.scheduler.schedule(2, 100)
+        await asyncio.sleep(0)
+        return list(processor._workers), processor.scheduler
+
+    with patch("orders_management_package.order_processor.process_order", fake_process_order):
+        processor = OrderProcessor(workers=2, max_queue_size=1)
+        first_loop, second_loop = asyncio.new_event_loop(), asyncio.new_event_loop()
+        try:
+            old_workers, old_scheduler = first_loop.run_until_complete(start_and_submit(processor))
+            second_loop.run_until_complete(start_and_submit(processor))
+            first_loop.run_until_complete(asyncio.sleep(0))
+            assert all(worker.cancelled() for worker in old_workers)
+            assert len(old_scheduler) == 0 and old_scheduler._driver is None
+            second_loop.run_until_complete(processor.stop())
+        finally:
+            first_loop.close()
+            second_loop.close()
+
+
+@pytest.mark.asyncio
+async def test_order_processor_should_keep_worker_slot_until_scheduled_completion_fires():
+    async def fake_process_order(order, scheduler):
+        scheduler.schedule(order.id, 100)
+
+    with patch("orders_management_package.order_processor.process_order", fake_process_order):
+        processor = OrderProcessor(workers=2, max_queue_size=3)
+        for order_id in range(1, 6):
+            processor.submit(make_order(order_id))
+            await asyncio.sleep(0)
+        with pytest.raises(OrderQueueFullException):
+            processor.submit(make_order(6))
+        metrics = processor.get_metrics()
+        assert metrics['in_flight'] == metrics['scheduled'] == 2
+        assert metrics['queue_depth'] == 3
+        assert processor.cancel(1)
+        await asyncio.sleep(0)
+        assert processor.get_metrics()['in_flight'] == 2
+        assert processor.get_metrics()['queue_depth'] == 2
+        await processor.stop()
+
+
+@pytest.mark.asyncio
+async def test_order_processor_should_forget_removed_orders_and_their_buffered_statuses():
+    async def fake_process_order(order, scheduler):
+        scheduler.schedule(order.id, 100)
+
+    with patch("orders_management_package.order_processor.process_order", fake_process_order), \
+            patch("orders_management_package.order_processor.status_writes") as status_writes:
+        processor = OrderProcessor(workers=1, max_queue_size=2)
+        for order_id in [1, 2, 3]:
+            processor.submit(make_order(order_id))
+            await asyncio.sleep(0)
+        processor.forget([1, 2])
+        await asyncio.sleep(0)
+        assert 1 not in processor.scheduler and 2 not in processor.scheduler
+        assert 3 in processor.scheduler
+        assert processor.get_metrics()['in_flight'] == 1
+        status_writes.discard.assert_called_once_with([1, 2])
+        await processor.stop()
@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from orders_management_package import OrderScheduler
+
+
+async def wait_until(condition, timeout: float = 5):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_order_scheduler_should_fire_due_orders_in_deadline_order_and_in_batches():
+    batches = []
+    scheduler = OrderScheduler(batches.append, batch_window=0.3)
+    for order_id, delay in [(1, 1), (2, 0.01), (3, 0.05), (4, 100)]:
+        scheduler.schedule(order_id, delay)
+    await wait_until(lambda: len(batches) == 2)
+    assert batches == [[2, 3], [1]]
+    assert 4 in scheduler and len(scheduler) == 1
+    await scheduler.stop()
+    assert len(scheduler) == 0
+
+
+@pytest.mark.asyncio
+async def test_order_scheduler_should_skip_cancelled_and_move_rescheduled_orders():
+    batches = []
+    scheduler = OrderScheduler(batches.append, batch_window=0)
+    scheduler.schedule(1, 0.01)
+    scheduler.schedule(2, 0.01)
+    scheduler.schedule(3, 100)
+    assert scheduler.cancel(1)
+    assert not scheduler.cancel(1)
+    assert scheduler.reschedule(2, 0.5)
+    assert scheduler.reschedule(3, 0.01)
+    assert not scheduler.reschedule(5, 0.01)
+    await wait_until(lambda: len(batches) == 2)
+    assert batches == [[3], [2]]
+    assert scheduler.fired_count == 2
+
+
+@pytest.mark.asyncio
+async def test_order_scheduler_should_wake_driver_for_earlier_deadline():
+    fired = []
+    scheduler = OrderScheduler(fired.extend, batch_window=0)
+    scheduler.schedule(1, 100)
+    await asyncio.sleep(0)
+    scheduler.schedule(2, 0.01)
+    await wait_until(lambda: fired)
+    assert fired == [2]
+    await scheduler.stop()
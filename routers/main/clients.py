@@ -4,11 +4,14 @@ from fastapi import APIRouter, Depends, Path, Query, HTTPException, UploadFile,
 from starlette import status
 from starlette.responses import JSONResponse, Response
 from app.main.background_tasks import send_notification_simulator
-from client_management_package import hash_password
+from client_management_package import hash_password_async, password_hasher
 from client_package import ClientOut
 from client_package.client import Client
-from dependencies_package.main.dependencies import verify_key_common, CommonQueryParamsClass, CommonDependencyAnnotation
-from memory_package import logger, orders_lock
+from dependencies_package.main.dependencies import (verify_key_common, CommonQueryParamsClass,
+                                                    CommonDependencyAnnotation, PaginationAnnotation,
+                                                    cut_page_and_set_cursor, UnitOfWorkDependency, MAX_PAGE_SIZE)
+from memory_package import logger, orders_lock, resolve, status_writes
+from orders_management_package import order_processor
 from app.main.tags import Tags
 import memory_package
 
@@ -16,31 +19,32 @@ client_router = APIRouter(prefix="/clients", tags=[Tags.clients])
 
 
 @client_router.patch("/update/password/{client_name}",
-                     response_model=None, dependencies=[Depends(verify_key_common)])
+                     response_model=None, dependencies=[Depends(verify_key_common), UnitOfWorkDependency])
 async def change_client_password(client_name: Annotated[str, Path()],
                                  password: Annotated[str | None, Query()] = None) -> JSONResponse | ClientOut:
-    client = memory_package.db.get_client_by_name(client_name)
+    client = await resolve(memory_package.db.get_client_by_name(client_name))
     if not client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"message": "Wrong name"})
     if password:
-        memory_package.db.change_client_password(client, password)
-    client_data = memory_package.db.map_client(client)
+        hashed_password = await hash_password_async(password)
+        await resolve(memory_package.db.change_client_password(client, hashed_password))
+    client_data = status_writes.overlay_client(await resolve(memory_package.db.map_client(client)))
     return ClientOut(**client_data)
 
 
-@client_router.put("/update/all/{client_name}", response_model=None)
+@client_router.put("/update/all/{client_name}", response_model=None, dependencies=[UnitOfWorkDependency])
 async def change_client_data(client_name: Annotated[str, Path()],
                              name: Annotated[str | None, Query()] = None,
                              password: Annotated[str | None, Query()] = None) -> JSONResponse | ClientOut:
-    client = memory_package.db.get_client_by_name(client_name)
+    client = await resolve(memory_package.db.get_client_by_name(client_name))
     if not client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"message": "Wrong name"})
-    client_data = memory_package.db.map_client(client)
+    client_data = status_writes.overlay_client(await resolve(memory_package.db.map_client(client)))
     updated_client = Client(**client_data)
     updated_client.name = name if name is not None else updated_client.name
     updated_client.password = password if password is not None else updated_client.password
-    memory_package.db.update_one_client(client_name, updated_client)
-    client_data = memory_package.db.map_client(updated_client)
+    await resolve(memory_package.db.update_one_client(client_name, updated_client))
+    client_data = status_writes.overlay_client(await resolve(memory_package.db.map_client(updated_client)))
     return ClientOut(**client_data)
 
 
@@ -56,18 +60,18 @@ async def fake_login_and_set_photo(commons: Annotated[CommonQueryParamsClass, De
     else:
         content = file.file.read()
         content = base64.b64encode(content).decode('utf-8')
-        client = memory_package.db.get_client_by_name(commons.name)
+        client = await resolve(memory_package.db.get_client_by_name(commons.name))
         client.photo = content
-        memory_package.db.update_one_client(commons.name, client)
-        client_data = memory_package.db.map_client(client)
+        await resolve(memory_package.db.update_one_client(commons.name, client))
+        client_data = status_writes.overlay_client(await resolve(memory_package.db.map_client(client)))
         return ClientOut(**client_data)
 
 
 @client_router.post("/fake_login", response_model=None)
 async def fake_login(commons: Annotated[CommonQueryParamsClass, Depends()]) -> ClientOut | JSONResponse:
-    client = memory_package.db.get_client_by_name(commons.name)
+    client = await resolve(memory_package.db.get_client_by_name(commons.name))
     if client and client.password == commons.password:
-        client_data = memory_package.db.map_client(client)
+        client_data = status_writes.overlay_client(await resolve(memory_package.db.map_client(client)))
         return ClientOut(**client_data)
     elif client and client.password != commons.password:
         return JSONResponse(status_code=status.HTTP_401_UNAUTHORIZED, content={"message": "Wrong password"})
@@ -83,24 +87,34 @@ async def delete_clients_of_ids(commons: CommonDependencyAnnotation):
         logger.warning(f"Tried to remove order with greater first id then last id")
         return JSONResponse(status_code=status.HTTP_412_PRECONDITION_FAILED,
                             content={"message": "First id greater than last id"})
-    clients_to_remove = []
     async with orders_lock:
-        for client in memory_package.db.get_clients_db():
-            if first <= client.id <= last:
-                clients_to_remove.append(client)
-        for client in clients_to_remove:
-            memory_package.db.remove_client(client)
+        removed_count, removed_order_ids = await resolve(memory_package.db.remove_clients_in_id_range(first, last))
+        order_processor.forget(removed_order_ids)
+    logger.info(f"Removed {removed_count} clients with ids between {first} and {last}")
     return JSONResponse(status_code=status.HTTP_200_OK,
-                        content={"message": "Success", "removed_count": len(clients_to_remove)})
+                        content={"message": "Success", "removed_count": removed_count})
+
+
+@client_router.get('/cache/stats')
+async def get_client_cache_stats():
+    if not isinstance(memory_package.db, memory_package.CachedDb):
+        return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Client cache disabled"})
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content={"message": "Success", "stats": memory_package.db.get_metrics()})
 
 
 @client_router.get('/', response_model=list[ClientOut])
-async def get_clients(count: Annotated[int | None, Query(gt=0)] = None):
-    clients = memory_package.db.get_clients_db(count)
-    return clients
+async def get_clients(pagination: PaginationAnnotation, response: Response,
+                      count: Annotated[int | None, Query(gt=0, le=MAX_PAGE_SIZE)] = None):
+    limit = count if count is not None else pagination['limit']
+    fetch_limit = limit + 1 if limit is not None else None
+    clients = [status_writes.overlay_client(client)
+               for client in await resolve(memory_package.db.get_clients_db(fetch_limit, pagination['after_id']))]
+    return cut_page_and_set_cursor(response, clients, limit, lambda client: client.id)
 
 
-@client_router.post('/add', response_model_exclude_unset=True, response_model=None)
+@client_router.post('/add', response_model_exclude_unset=True, response_model=None,
+                    dependencies=[UnitOfWorkDependency])
 async def add_client_without_task(background_tasks: BackgroundTasks,
                                   client_name1: Annotated[
                                       str, Query(min_length=3, max_length=30, pattern="^.+$", title="Main name",
@@ -110,11 +124,15 @@ async def add_client_without_task(background_tasks: BackgroundTasks,
                                   passwords: Annotated[
                                       list[str] | None, Query(alias="passes")] = None) -> Response | ClientOut:
     full_name = client_name1 if client_name2 is None else client_name1 + client_name2
+    if await resolve(memory_package.db.get_client_by_name(full_name)) is not None:
+        logger.warning('Client already exists')
+        return JSONResponse(status_code=status.HTTP_409_CONFLICT, content={"message": "Name used"})
+    hashed_password = await hash_password_async("".join(passwords)) if passwords \
+        else await password_hasher.default_password_hash()
     async with orders_lock:
-        client = memory_package.db.get_client_by_name(full_name)
+        client = await resolve(memory_package.db.get_client_by_name(full_name))
         if client is None:
-            password = "".join(passwords) if passwords else "123"
-            memory_package.db.add_client(name=full_name, password=hash_password(password))
+            await resolve(memory_package.db.add_client(name=full_name, password=hashed_password))
             logger.info(f"Created new client without orders with name {full_name}")
             background_tasks.add_task(send_notification_simulator, name=full_name)
             return ClientOut(name=full_name)
@@ -1,25 +1,25 @@
-import asyncio
 from typing import Annotated
 from fastapi import APIRouter, Query, Depends, Header, Body, Path, HTTPException, BackgroundTasks
-from fastapi.encoders import jsonable_encoder
 from starlette import status
-from starlette.responses import JSONResponse, Response
+from starlette.responses import JSONResponse, Response, StreamingResponse
 import memory_package
 from app.main.background_tasks import send_notification_simulator
 from client_package.client import ClientOut
-from client_management_package import hash_password
-from dependencies_package.main.dependencies import CommonDependencyAnnotation, oauth2_scheme, get_current_client
-from app.main.exceptions import NoOrderException
+from client_management_package import password_hasher
+from dependencies_package.main.dependencies import (CommonDependencyAnnotation, oauth2_scheme, get_current_client,
+                                                    PaginationAnnotation, cut_page_and_set_cursor, UnitOfWorkDependency)
+from app.main.exceptions import NoOrderException, OrderQueueFullException
 from orders_management_package.mapper import map_order_dto_to_order
-from memory_package import orders_lock, logger
+from memory_package import orders_lock, logger, resolve, status_writes
 from order_package import OrderStatus, Order
-from orders_management_package import OrderDTO, process_order
+from orders_management_package import OrderDTO, order_processor
 from app.main.tags import Tags
+from routers.main.serialization import orders_json_response, order_json_line
 
 order_router = APIRouter(prefix="/orders")
 
 
-@order_router.post('/swap/{order_id}', tags=[Tags.order_update])
+@order_router.post('/swap/{order_id}', tags=[Tags.order_update], dependencies=[UnitOfWorkDependency])
 async def swap_orders_client(background_tasks: BackgroundTasks,
                              order_id: int, client_id: Annotated[int | None, Query(openapi_examples={
             "normal": {
@@ -34,23 +34,25 @@ async def swap_orders_client(background_tasks: BackgroundTasks,
             }
         })] = None):   # noqa: E501
     async with orders_lock:
-        swapped_order = memory_package.db.get_order_by_id(order_id)
+        swapped_order = await resolve(memory_package.db.get_order_by_id(order_id))
         if swapped_order:
             logger.info(f"Swapping client of order with id {order_id}")
-            old_client = memory_package.db.get_client_by_id(swapped_order.client_id)
-            memory_package.db.remove_order_from_client(old_client, swapped_order)
+            old_client = await resolve(memory_package.db.get_client_by_id(swapped_order.client_id))
+            await resolve(memory_package.db.remove_order_from_client(old_client, swapped_order))
             if client_id is not None:
-                new_client = memory_package.db.get_client_by_id(client_id)
+                new_client = await resolve(memory_package.db.get_client_by_id(client_id))
                 if new_client is None:
-                    client_id = memory_package.db.add_client(name="New client" + str(client_id),
-                                                             password=hash_password("123"))
-                    memory_package.db.add_order_to_client(swapped_order, memory_package.db.get_client_by_id(client_id))
+                    default_password = await password_hasher.default_password_hash()
+                    client_id = await resolve(memory_package.db.add_client(name="New client" + str(client_id),
+                                                                           password=default_password))
+                    new_client = await resolve(memory_package.db.get_client_by_id(client_id))
+                    await resolve(memory_package.db.add_order_to_client(swapped_order, new_client))
                     background_tasks.add_task(send_notification_simulator, name="New client" + str(client_id))
                     logger.info('Created new client')
                 else:
-                    memory_package.db.add_order_to_client(swapped_order, new_client)
+                    await resolve(memory_package.db.add_order_to_client(swapped_order, new_client))
                     logger.info('Added new order to the existing client')
-            memory_package.db.change_order_owner(client_id, swapped_order.id)
+            await resolve(memory_package.db.change_order_owner(client_id, swapped_order.id))
             return JSONResponse(status_code=status.HTTP_201_CREATED, content={"message": "Success"})
         else:
             logger.warning(f"No order with id {order_id}")
@@ -65,26 +67,36 @@ async def delete_orders_of_ids(commons: CommonDependencyAnnotation):
         logger.warning(f"Tried to remove order with greater first id then last id")
         return JSONResponse(status_code=status.HTTP_412_PRECONDITION_FAILED,
                             content={"message": "First id greater than last id"})
-    orders_to_remove = []
     async with orders_lock:
-        for order in memory_package.db.get_orders_db():
-            if first <= order.id <= last:
-                orders_to_remove.append(order)
-        for order in orders_to_remove:
-            memory_package.db.remove_order(order)
-            logger.info(f"Removing order with id {order.id}")
-            memory_package.db.remove_order_from_client(memory_package.db.get_client_by_id(order.client_id), order)
+        removed_ids = await resolve(memory_package.db.remove_orders_in_id_range(first, last))
+        order_processor.forget(removed_ids)
+    removed_count = len(removed_ids)
+    logger.info(f"Removed {removed_count} orders with ids between {first} and {last}")
     return JSONResponse(status_code=status.HTTP_200_OK,
-                        content={"message": "Success", "removed_count": len(orders_to_remove)})
+                        content={"message": "Success", "removed_count": removed_count})
 
 
 @order_router.get('/get/status/{status_name}', tags=[Tags.order_get])
-async def get_orders_by_status(status_name: OrderStatus):
-    async with (orders_lock):
-        logger.info(f"Return orders with status = {status_name.value} list")
-        return_dict = [jsonable_encoder(Order.model_validate(order).model_dump())
-                       for order in memory_package.db.get_orders_db() if order.status == status_name]
-        return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Success", "orders": return_dict})
+async def get_orders_by_status(status_name: OrderStatus, limit: Annotated[int | None, Query(gt=0)] = None,
+                               after_id: int | None = None):
+    async with orders_lock.reading():
+        orders = await _orders_with_status(status_name, limit, after_id)
+    logger.info(f"Return orders with status = {status_name.value} list")
+    return orders_json_response(orders)
+
+
+async def _orders_with_status(status_name: OrderStatus, limit: int | None, after_id: int | None):
+    fetch_limit = limit + len(status_writes) if limit is not None else None
+    stored_orders = await resolve(memory_package.db.get_orders_by_status(status_name, fetch_limit, after_id))
+    orders = [order for order in stored_orders if status_writes.overlay(order).status == status_name]
+    fetched_ids = {order.id for order in orders}
+    for order_id in status_writes.ids_with_status(status_name):
+        if order_id not in fetched_ids and (after_id is None or order_id > after_id):
+            order = await resolve(memory_package.db.get_order_by_id(order_id))
+            if order is not None:
+                orders.append(status_writes.overlay(order))
+    orders.sort(key=lambda order: order.id)
+    return orders[:limit] if limit is not None else orders
 
 
 @order_router.get('/get/headers', tags=[Tags.order_get])
@@ -96,112 +108,151 @@ async def get_orders_counts_from_header(clients_ids: Annotated[str | None, Heade
             clients_ids_int_list.append(int(client_id))
         except ValueError:
             return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"message": "Incorrect header values"})
-    clients_ids_int_list = [int(client_id) for client_id in clients_ids_list]
-    async with orders_lock:
-        clients = memory_package.db.get_clients_by_ids(clients_ids_int_list)
-    if len(clients) > 0:
-        results = []
-        for client in clients:
-            logger.info(f"Return user''s {client.name} orders count from header")
-            async with orders_lock:
-                results.append(len(memory_package.db.get_orders_by_client_name(client.name)))
+    async with orders_lock.reading():
+        orders_counts = await resolve(memory_package.db.count_orders_by_client_ids(clients_ids_int_list))
+    if len(orders_counts) > 0:
+        logger.info(f"Return orders counts of users with ids {list(orders_counts)} from header")
         return JSONResponse(status_code=status.HTTP_200_OK,
-                            content={"message": "Success", "clients_orders_count": results})
+                            content={"message": "Success", "clients_orders_count": list(orders_counts.values())})
     else:
         logger.warning(f"No user with ids given in header")
         return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"message": "Incorrect header values"})
 
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _ndjson_lines(rows):
+    if hasattr(rows, '__aiter__'):
+        async def lines():
+            async for row in rows:
+                yield order_json_line(status_writes.overlay(row))
+        return lines()
+    return (order_json_line(status_writes.overlay(row)) for row in rows)
+
+
 @order_router.get('/get/all', response_model=list[Order], status_code=status.HTTP_202_ACCEPTED, tags=[Tags.order_get])
-async def get_orders(_token: Annotated[str, Depends(oauth2_scheme)]):
+async def get_orders(_token: Annotated[str, Depends(oauth2_scheme)], pagination: PaginationAnnotation,
+                     response: Response, stream: bool = False, accept: Annotated[str | None, Header()] = None):
+    if stream or (accept and NDJSON_MEDIA_TYPE in accept):
+        logger.info('Stream all orders list')
+        rows = memory_package.db.stream_all_orders_as_dict(pagination['after_id'])
+        return StreamingResponse(_ndjson_lines(rows), status_code=status.HTTP_202_ACCEPTED,
+                                 media_type=NDJSON_MEDIA_TYPE)
     logger.info('Return all orders list ')
-    return_dict = await memory_package.db.get_all_orders_as_dict()
-    return return_dict
+    limit = pagination['limit']
+    fetch_limit = limit + 1 if limit is not None else None
+    return_dict = [status_writes.overlay(order) for order in
+                   await memory_package.db.get_all_orders_as_dict(fetch_limit, pagination['after_id'])]
+    return cut_page_and_set_cursor(response, return_dict, limit, lambda order: order['id'])
 
 
 @order_router.get('/get/current', tags=[Tags.order_get])
 async def get_orders_by_current_client(current_user: Annotated[ClientOut | memory_package.Client, Depends(get_current_client)]):  # noqa: E501
-    return await get_orders_by_client(memory_package.db.get_client_id_from_client_by_name(current_user.name))
+    return await get_orders_by_client(
+        await resolve(memory_package.db.get_client_id_from_client_by_name(current_user.name)))
 
 
 @order_router.get('/get/{client_id}', tags=[Tags.order_get])
 async def get_orders_by_client(client_id: int):
-    async with orders_lock:
-        orders = memory_package.db.get_orders_by_client_id(client_id)
+    async with orders_lock.reading():
+        orders = await resolve(memory_package.db.get_orders_by_client_id(client_id))
     if orders is not None:
         logger.info(f"Return user''s {client_id} orders list")
-        return JSONResponse(status_code=status.HTTP_200_OK,
-                            content={"message": "Success",
-                                     "orders": [jsonable_encoder(Order.model_validate(order).model_dump()) for order in orders]})  # noqa: E501
+        return orders_json_response([status_writes.overlay(order) for order in orders])
     else:
         logger.warning(f"No user with id: {client_id}")
         return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"message": "Incorrect id"})
 
 
+@order_router.get('/process/stats', tags=[Tags.order_process])
+async def get_processing_stats():
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content={"message": "Success", "stats": order_processor.get_metrics(),
+                                 "status_writes": status_writes.get_metrics(),
+                                 "password_hasher": password_hasher.get_metrics()})
+
+
 @order_router.post('/process/{order_id}', tags=[Tags.order_process])
 async def process_order_of_id(order_id: Annotated[int, Path(title="Order to process", ge=0)],
                               resp_fail1: Annotated[str | None, Body()] = "No such order",
                               resp_fail2: Annotated[str | None, Body()] = "Order does not await for process",
                               resp_success: str | None = "Success") -> Response:
     async with orders_lock:
-        order = memory_package.db.get_order_by_id(order_id)
+        order = await resolve(memory_package.db.get_order_by_id(order_id))
+        claimed_order = await resolve(memory_package.db.claim_order_for_processing(order_id)) \
+            if order is not None and order.status == OrderStatus.received else None
     if order is None:
         logger.warning(f"No awaiting order with id = {order_id}")
         raise NoOrderException(order_id=order_id, message=resp_fail1)
-    elif order.status != OrderStatus.received:
+    elif claimed_order is None:
         logger.warning(f"Order with id = {order_id} has wrong status")
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail={"message": resp_fail2})
     else:
-        asyncio.create_task(process_order(order))  # noqa
+        await _submit_claimed_order(claimed_order)
         logger.info(f"Processing order with id = {order_id}")
         return JSONResponse(status_code=status.HTTP_200_OK, content={"message": resp_success, "orderId": order.id})
 
 
 @order_router.post('/process', tags=[Tags.order_process], deprecated=True)
 async def process_next_order() -> JSONResponse:
-    order = await memory_package.db.get_first_order_with_status(OrderStatus.received)
+    async with orders_lock:
+        order = await resolve(memory_package.db.claim_order_for_processing())
     if order is None:
         logger.warning("No awaiting order")
         raise NoOrderException(message="No awaiting order")
     else:
-        asyncio.create_task(process_order(order))  # noqa
+        await _submit_claimed_order(order)
         logger.info("Processing order")
         return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Success", "orderId": order.id})
 
 
-@order_router.post('/{client_id}', tags=[Tags.order_create])
+async def _submit_claimed_order(order: Order) -> None:
+    try:
+        order_processor.submit(order)
+    except OrderQueueFullException:
+        async with orders_lock:
+            order.status = OrderStatus.received
+            await resolve(memory_package.db.replace_order_in_client_object(order))
+        raise
+
+
+@order_router.post('/{client_id}', tags=[Tags.order_create], dependencies=[UnitOfWorkDependency])
 async def create_order(background_tasks: BackgroundTasks, client_id: int,
                        order_dto: Annotated[OrderDTO | None, Body()] = None):
     if order_dto is None:
         logger.warning('No order')
         raise NoOrderException(order_id=client_id)
     async with orders_lock:
-        client = memory_package.db.get_client_by_id(client_id)
+        client = await resolve(memory_package.db.get_client_by_id(client_id))
         if not client:
-            new_order = map_order_dto_to_order(order_dto)
-            assigned_client_id = memory_package.db.add_client(
-                name="New client" + str(client_id), password=hash_password("123"))
+            new_order = await map_order_dto_to_order(order_dto)
+            default_password = await password_hasher.default_password_hash()
+            assigned_client_id = await resolve(memory_package.db.add_client(
+                name="New client" + str(client_id), password=default_password))
             new_order.client_id = assigned_client_id
-            memory_package.db.add_order_to_client(new_order, memory_package.db.get_client_by_id(assigned_client_id))
+            assigned_client = await resolve(memory_package.db.get_client_by_id(assigned_client_id))
+            await resolve(memory_package.db.add_order_to_client(new_order, assigned_client))
             background_tasks.add_task(send_notification_simulator, name="New client" + str(client_id))
             logger.info('Created new client')
         else:
-            new_order = map_order_dto_to_order(order_dto, client_id)
-            memory_package.db.add_order_to_client(new_order, client)
+            new_order = await map_order_dto_to_order(order_dto, client_id)
+            await resolve(memory_package.db.add_order_to_client(new_order, client))
             logger.info('Added new order to the existing client')
-        memory_package.db.add_order(new_order)
+        await resolve(memory_package.db.add_order(new_order))
     return JSONResponse(status_code=status.HTTP_201_CREATED, content={"message": "Success"})
 
 
-@order_router.delete('/{order_id}', tags=[Tags.order_delete])
+@order_router.delete('/{order_id}', tags=[Tags.order_delete], dependencies=[UnitOfWorkDependency])
 async def delete_order(order_id: int):
     async with orders_lock:
-        removed_order = memory_package.db.get_order_by_id(order_id)
+        removed_order = await resolve(memory_package.db.get_order_by_id(order_id))
         if removed_order:
-            memory_package.db.remove_order(removed_order)
+            await resolve(memory_package.db.remove_order(removed_order))
+            order_processor.forget([order_id])
             logger.info(f"Removing order with id {order_id}")
-            client = memory_package.db.get_client_by_id(removed_order.client_id)
-            memory_package.db.remove_order_from_client(client, removed_order)
+            client = await resolve(memory_package.db.get_client_by_id(removed_order.client_id))
+            await resolve(memory_package.db.remove_order_from_client(client, removed_order))
             return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Success"})
         else:
             logger.warning(f"No order with id {order_id}")
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, TypeAdapter
+from starlette import status
+from starlette.responses import Response
+from order_package import Order
+
+
+class OrdersMessage(BaseModel):
+    message: str = "Success"
+    orders: list[Order]
+
+
+order_adapter = TypeAdapter(Order)
+
+
+def orders_json_response(orders, status_code: int = status.HTTP_200_OK) -> Response:
+    return Response(content=OrdersMessage(orders=orders).model_dump_json(), status_code=status_code,
+                    media_type="application/json")
+
+
+def order_json_line(order) -> bytes:
+    return order_adapter.dump_json(order_adapter.validate_python(order)) + b"\n"
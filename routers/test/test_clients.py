@@ -1,10 +1,13 @@
 import os
+from unittest.mock import patch
 import pytest
 from starlette import status
 from starlette.testclient import TestClient
 from client_management_package.main.passwords import pwd_context
 from app.main.main import app
 from memory_package import set_calls_count
+from orders_management_package import order_processor
+from dependencies_package.main.dependencies import MAX_PAGE_SIZE
 from commons import (client1, client2, client3, name1, name2, password_list, local_add_order_to_db_and_client,
                      local_add_client)
 import memory_package
@@ -83,6 +86,18 @@ def test_change_client_data_should_update_name_and_password_to_correct_values():
     assert memory_package.db.get_password_from_client_by_name("NewClientName") == new_password2
 
 
+def test_change_client_data_should_keep_client_reachable_by_id_and_new_name_only():
+    client_id = local_add_client(client1)
+    local_add_order_to_db_and_client(client_id, "order1")
+    params = {"name": "NewClientName"}
+    response = test_client.put("/clients/update/all/" + client1.name, params=params)
+    assert response.status_code == status.HTTP_200_OK
+    assert memory_package.db.get_client_by_name(client1.name) is None
+    assert memory_package.db.get_client_by_name("NewClientName").id == client_id
+    assert memory_package.db.get_client_by_id(client_id).name == "NewClientName"
+    assert len(memory_package.db.get_orders_by_client_id(client_id)) == 1
+
+
 def test_change_client_data_should_return_404_status_code_when_name_not_in_database():
     local_add_client(client1)
     params = {"name": "NewClientName", "password": "ABCD"}
@@ -219,10 +234,25 @@ def test_get_clients_should_return_correct_number_of_clients():
     assert len(response.json()) == len(clients) - 1
 
 
+def test_get_clients_should_return_next_page_after_cursor_from_header():
+    for client in [client1, client2, client3]:
+        local_add_client(client)
+    response = test_client.get("/clients/", params={"limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert [client['name'] for client in response.json()] == [client1.name, client2.name]
+    params = {"limit": 2, "after_id": response.headers['next_after_id']}
+    response = test_client.get("/clients/", params=params)
+    assert [client['name'] for client in response.json()] == [client3.name]
+    assert 'next_after_id' not in response.headers
+
+
 def test_get_clients_should_return_422_status_code_when_query_parameter_value_incorrect():
     params = {"count": -1}
     response = test_client.get("/clients/", params=params)
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    params = {"count": MAX_PAGE_SIZE + 1}
+    response = test_client.get("/clients/", params=params)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
 
 def test_add_client_without_task_should_return_added_client_data():
@@ -276,3 +306,15 @@ def test_add_client_without_task_should_return_422_status_code_when_query_parame
     params = {"client_name1": "A"}
     response = test_client.post("/clients/add", params=params)
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_delete_clients_of_ids_should_forget_scheduled_completions_of_removed_client_orders():
+    client_id1 = local_add_client(client1)
+    client_id2 = local_add_client(client2)
+    order_ids = [local_add_order_to_db_and_client(client_id1, "order1"),
+                 local_add_order_to_db_and_client(client_id1, "order2")]
+    local_add_order_to_db_and_client(client_id2, "order3")
+    with patch.object(order_processor, 'forget') as forget:
+        response = test_client.delete("/clients/remove", params={"first": client_id1, "last": client_id1})
+    assert response.status_code == status.HTTP_200_OK
+    assert sorted(forget.call_args.args[0]) == order_ids
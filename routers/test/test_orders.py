@@ -1,11 +1,15 @@
+import json
+from unittest.mock import patch
 import jwt
 import pytest
 from starlette import status
 from starlette.testclient import TestClient
 from client_management_package import SECRET_KEY, ALGORITHM
+from dependencies_package.main import dependencies
 from app.main.main import app
 from memory_package import set_calls_count
 from order_package import OrderStatus
+from orders_management_package import order_processor
 from commons import client1, client2, local_add_order_to_db_and_client, local_add_client
 import memory_package
 
@@ -61,6 +65,20 @@ def test_swap_orders_client_should_remove_owner_from_order_when_query_parameter_
     assert memory_package.db.get_order_by_id(order_id).client_id is None
 
 
+def test_get_orders_by_client_should_follow_owner_and_status_changes():
+    client_id1 = local_add_client(client1)
+    client_id2 = local_add_client(client2)
+    order_id1 = local_add_order_to_db_and_client(client_id1, "order1")
+    order_id2 = local_add_order_to_db_and_client(client_id1, "order2")
+    test_client.post("/orders/swap/" + str(order_id1), params={'client_id': client_id2})
+    memory_package.db.claim_order_for_processing(order_id2)
+    response = test_client.get("/orders/get/" + str(client_id1))
+    assert [(order['id'], order['status']) for order in response.json()['orders']] == \
+           [(order_id2, OrderStatus.in_progress.value)]
+    response = test_client.get("/orders/get/" + str(client_id2))
+    assert [order['id'] for order in response.json()['orders']] == [order_id1]
+
+
 def test_delete_order_should_remove_order():
     client_id = local_add_client(client1)
     order_id1 = local_add_order_to_db_and_client(client_id, "order1")
@@ -71,6 +89,15 @@ def test_delete_order_should_remove_order():
     assert memory_package.db.get_orders_count() == 1
 
 
+def test_delete_order_should_cancel_its_scheduled_completion():
+    client_id = local_add_client(client1)
+    order_id = local_add_order_to_db_and_client(client_id, "order1")
+    with patch.object(order_processor, 'forget') as forget:
+        response = test_client.delete("/orders/" + str(order_id))
+    assert response.status_code == status.HTTP_200_OK
+    forget.assert_called_once_with([order_id])
+
+
 def test_delete_order_should_return_404_status_code_if_order_does_not_exist():
     client_id = local_add_client(client1)
     local_add_order_to_db_and_client(client_id, "order1")
@@ -103,6 +130,15 @@ def test_delete_orders_of_ids_should_remove_all_orders_with_ids_between_given():
     assert response.json()['removed_count'] == 2
 
 
+def test_delete_orders_of_ids_should_forget_scheduled_completions_of_removed_orders():
+    client_id = local_add_client(client1)
+    order_ids = [local_add_order_to_db_and_client(client_id, "order" + str(number)) for number in range(3)]
+    with patch.object(order_processor, 'forget') as forget:
+        response = test_client.delete("/orders/remove", params={"first": order_ids[0], "last": order_ids[1]})
+    assert response.status_code == status.HTTP_200_OK
+    assert sorted(forget.call_args.args[0]) == order_ids[:2]
+
+
 def test_delete_orders_of_ids_should_return_412_status_code_when_first_id_greater_than_last_id_query_parameter():
     params = {"first": 2, "last": 1}
     response = test_client.delete("/orders/remove", params=params)
@@ -177,6 +213,52 @@ def test_get_orders_should_return_list_with_created_orders():
     assert orders[0]['description'] == "order1"
 
 
+def test_get_orders_should_return_next_page_after_cursor_from_header():
+    client_id = local_add_client(client1)
+    for order_desc in ["order1", "order2", "order3"]:
+        local_add_order_to_db_and_client(client_id, order_desc)
+    encoded_token = jwt.encode({'subs': client1.name}, SECRET_KEY, algorithm=ALGORITHM)
+    header = {"Authorization": f"Bearer {encoded_token}"}
+    response = test_client.get("/orders/get/all", headers=header, params={"limit": 2})
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert [order['description'] for order in response.json()] == ["order1", "order2"]
+    params = {"limit": 2, "after_id": response.headers['next_after_id']}
+    response = test_client.get("/orders/get/all", headers=header, params=params)
+    assert [order['description'] for order in response.json()] == ["order3"]
+    assert 'next_after_id' not in response.headers
+
+
+def test_get_orders_should_return_all_orders_unless_limit_or_cursor_given():
+    client_id = local_add_client(client1)
+    for order_desc in ["order1", "order2", "order3"]:
+        local_add_order_to_db_and_client(client_id, order_desc)
+    encoded_token = jwt.encode({'subs': client1.name}, SECRET_KEY, algorithm=ALGORITHM)
+    header = {"Authorization": f"Bearer {encoded_token}"}
+    with patch.object(dependencies, 'DEFAULT_PAGE_SIZE', 1):
+        response = test_client.get("/orders/get/all", headers=header)
+        assert [order['description'] for order in response.json()] == ["order1", "order2", "order3"]
+        assert 'next_after_id' not in response.headers
+        first_id = response.json()[0]['id']
+        response = test_client.get("/orders/get/all", headers=header, params={"after_id": first_id})
+        assert [order['description'] for order in response.json()] == ["order2"]
+        assert 'next_after_id' in response.headers
+
+
+@pytest.mark.parametrize("params, headers", [({"stream": True}, {}), ({}, {"Accept": "application/x-ndjson"})])
+def test_get_orders_should_stream_ndjson_when_requested(params, headers):
+    client_id = local_add_client(client1)
+    for order_desc in ["order1", "order2", "order3"]:
+        local_add_order_to_db_and_client(client_id, order_desc)
+    encoded_token = jwt.encode({'subs': client1.name}, SECRET_KEY, algorithm=ALGORITHM)
+    headers = headers | {"Authorization": f"Bearer {encoded_token}"}
+    response = test_client.get("/orders/get/all", headers=headers, params=params)
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.headers['content-type'] == "application/x-ndjson"
+    orders = [json.loads(line) for line in response.text.splitlines()]
+    assert [order['description'] for order in orders] == ["order1", "order2", "order3"]
+    assert orders == test_client.get("/orders/get/all", headers={"Authorization": headers["Authorization"]}).json()
+
+
 def test_get_orders_counts_from_header_should_return_list_with_counted_given_users_orders():
     client_id1 = local_add_client(client1)
     local_add_order_to_db_and_client(client_id1, "order1")
@@ -190,6 +272,16 @@ def test_get_orders_counts_from_header_should_return_list_with_counted_given_use
     assert orders_count == [2, 0]
 
 
+def test_get_orders_counts_from_header_should_count_repeated_ids_once_in_id_order():
+    client_id1 = local_add_client(client1)
+    client_id2 = local_add_client(client2)
+    local_add_order_to_db_and_client(client_id2, "order1")
+    headers = {'clients-ids': f"{client_id2},{client_id1},{client_id2},{2 ** 40}"}
+    response = test_client.get("/orders/get/headers", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['clients_orders_count'] == [0, 1]
+
+
 def test_get_orders_counts_from_header_should_return_list_ignoring_users_that_do_not_exist():
     client_id1 = local_add_client(client1)
     local_add_order_to_db_and_client(client_id1, "order1")
@@ -396,3 +488,67 @@ def test_create_order_should_return_422_status_code_when_json_body_is_invalid():
     order_data = {"time": 44}
     response = test_client.post("/orders/" + str(client_id), json=order_data)
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_get_processing_stats_should_return_queue_metrics():
+    client_id = local_add_client(client1)
+    local_add_order_to_db_and_client(client_id, "order1")
+    test_client.post("/orders/process")
+    response = test_client.get("/orders/process/stats")
+    assert response.status_code == status.HTTP_200_OK
+    stats = response.json()['stats']
+    assert {"queue_depth", "in_flight", "completed_per_second"} <= stats.keys()
+    assert {"pending", "submitted", "completed", "rejected"} <= response.json()['password_hasher'].keys()
+
+
+def test_claim_order_for_processing_should_claim_each_received_order_once():
+    client_id = local_add_client(client1)
+    local_add_order_to_db_and_client(client_id, "order1")
+    completed_order_id = local_add_order_to_db_and_client(client_id, "order2", OrderStatus.complete)
+    local_add_order_to_db_and_client(client_id, "order3")
+    claimed_order = memory_package.db.claim_order_for_processing()
+    assert claimed_order.description == "order1"
+    assert claimed_order.status == OrderStatus.in_progress
+    assert memory_package.db.claim_order_for_processing(completed_order_id) is None
+    assert memory_package.db.claim_order_for_processing().description == "order3"
+    assert memory_package.db.claim_order_for_processing() is None
+
+
+def test_delete_orders_of_ids_should_remove_deleted_orders_from_their_clients():
+    client_id1 = local_add_client(client1)
+    client_id2 = local_add_client(client2)
+    order_id1 = local_add_order_to_db_and_client(client_id1, "order1")
+    order_id2 = local_add_order_to_db_and_client(client_id2, "order2")
+    params = {"first": order_id1, "last": order_id2}
+    response = test_client.delete("/orders/remove", params=params)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()['removed_count'] == 2
+    assert len(memory_package.db.get_orders_by_client_id(client_id1)) == 0
+    assert len(memory_package.db.get_orders_by_client_id(client_id2)) == 0
+    assert memory_package.db.get_order_by_id(order_id1) is None
+
+
+def test_get_orders_by_status_should_return_limited_orders_after_given_id():
+    client_id = local_add_client(client1)
+    local_add_order_to_db_and_client(client_id, "order1", OrderStatus.complete)
+    local_add_order_to_db_and_client(client_id, "order2")
+    local_add_order_to_db_and_client(client_id, "order3", OrderStatus.complete)
+    local_add_order_to_db_and_client(client_id, "order4", OrderStatus.complete)
+    response = test_client.get("/orders/get/status/" + OrderStatus.complete.value, params={"limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    orders = response.json()['orders']
+    assert [order['description'] for order in orders] == ["order1", "order3"]
+    params = {"limit": 2, "after_id": orders[-1]['id']}
+    response = test_client.get("/orders/get/status/" + OrderStatus.complete.value, params=params)
+    assert [order['description'] for order in response.json()['orders']] == ["order4"]
+
+
+def test_get_orders_by_status_should_follow_processing_status_changes():
+    client_id = local_add_client(client1)
+    local_add_order_to_db_and_client(client_id, "order1")
+    local_add_order_to_db_and_client(client_id, "order2")
+    test_client.post("/orders/process")
+    response = test_client.get("/orders/get/status/" + OrderStatus.in_progress.value)
+    assert [order['description'] for order in response.json()['orders']] == ["order1"]
+    response = test_client.get("/orders/get/status/" + OrderStatus.received.value)
+    assert [order['description'] for order in response.json()['orders']] == ["order2"]
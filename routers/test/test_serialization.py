@@ -0,0 +1,35 @@
+import json
+from datetime import datetime, timezone, timedelta
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+from memory_package.sql_model_db.models import Order as OrderModel
+from order_package import Order, OrderStatus
+from routers.main.serialization import orders_json_response, order_json_line
+
+orders = [Order(id=1, description="zażółć \"order\"", client_id=1, creation_date=datetime(2024, 1, 1, 10, 0)),
+          OrderModel(id=2, description="order2", status=OrderStatus.in_progress, client_id=None,
+                     creation_date=datetime(2024, 1, 1, 10, 0, 0, 123456)),
+          Order(id=3, description="order3", client_id=1,
+                creation_date=datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc)),
+          Order(id=4, description="order4", client_id=1,
+                creation_date=datetime(2024, 1, 1, 10, 0, tzinfo=timezone(timedelta(hours=2))))]
+
+
+def test_orders_json_response_should_render_same_body_as_jsonable_encoder_path():
+    expected = JSONResponse(content={"message": "Success",
+                                     "orders": [jsonable_encoder(Order.model_validate(order).model_dump())
+                                                for order in orders]})
+    response = orders_json_response(orders)
+    assert response.body == expected.body
+    assert response.headers['content-type'] == expected.headers['content-type']
+    assert b'"2024-01-01T10:00:00+00:00"' in response.body
+
+
+def test_order_json_line_should_keep_utc_offset_of_aware_creation_date():
+    assert json.loads(order_json_line(orders[2]))['creation_date'] == "2024-01-01T10:00:00+00:00"
+
+
+def test_order_json_line_should_render_order_as_single_json_line():
+    line = order_json_line(orders[1].model_dump())
+    assert line.endswith(b"\n") and line.count(b"\n") == 1
+    assert json.loads(line) == jsonable_encoder(Order.model_validate(orders[1]).model_dump())